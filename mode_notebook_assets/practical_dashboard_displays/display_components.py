@@ -1,15 +1,139 @@
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
+from itertools import repeat
+from string import Template
 from typing import List
+from uuid import uuid4
 
 import numpy as np
 import pandas as pd
+from pandas.api.types import is_complex, is_float
 from plotly import graph_objects as go
+from plotly.offline import get_plotlyjs
 
-from mode_notebook_assets.practical_dashboard_displays.legacy_helper_functions import map_actionability_score_to_color
+from mode_notebook_assets.practical_dashboard_displays.executors import map_with_executor
+from mode_notebook_assets.practical_dashboard_displays.legacy_helper_functions import get_actionability_color_mapper, \
+    get_scatter_trace_type
 from mode_notebook_assets.practical_dashboard_displays import MetricEvaluationPipeline
 
 
-def html_div_grid(html_elements:list, table_width='98%', cell_padding='5px', columns=3):
+# Hydrates the cells of a lazy html_div_grid as they scroll into view. Cell content is kept inert in a
+# <template> until then. Scripts inserted from a template do not run, so they are recreated. Once more
+# than max_live_cells cells are live, the least recently hydrated cells that are out of view are
+# emptied again (purging their plotly charts) and hydrated again if they scroll back into view.
+LAZY_GRID_SCRIPT = Template('''<script type="text/javascript">
+(function () {
+  var grid = document.getElementById('$grid_id');
+  var cells = Array.prototype.slice.call(grid.querySelectorAll('[data-lazy-cell]'));
+  var maxLiveCells = $max_live_cells;
+  var liveCells = [];
+  var visibleCells = [];
+
+  function hydrate(cell) {
+    var content = cell.querySelector('template').content.cloneNode(true);
+    Array.prototype.forEach.call(content.querySelectorAll('script'), function (inertScript) {
+      var script = document.createElement('script');
+      Array.prototype.forEach.call(inertScript.attributes, function (a) { script.setAttribute(a.name, a.value); });
+      script.async = false;
+      script.text = inertScript.text;
+      inertScript.parentNode.replaceChild(script, inertScript);
+    });
+    var container = document.createElement('div');
+    container.setAttribute('data-lazy-content', '');
+    container.appendChild(content);
+    cell.appendChild(container);
+    liveCells.push(cell);
+  }
+
+  function dehydrate(cell) {
+    var container = cell.querySelector('[data-lazy-content]');
+    if (window.Plotly) {
+      Array.prototype.forEach.call(container.querySelectorAll('.js-plotly-plot'), function (div) {
+        window.Plotly.purge(div);
+      });
+    }
+    cell.style.minHeight = cell.offsetHeight + 'px';
+    cell.removeChild(container);
+    liveCells.splice(liveCells.indexOf(cell), 1);
+  }
+
+  function enforceCap() {
+    var candidates = liveCells.filter(function (cell) { return visibleCells.indexOf(cell) < 0; });
+    while (liveCells.length > maxLiveCells && candidates.length > 0) {
+      dehydrate(candidates.shift());
+    }
+  }
+
+  if (!('IntersectionObserver' in window)) {
+    cells.forEach(hydrate);
+    return;
+  }
+
+  var observer = new IntersectionObserver(function (entries) {
+    entries.forEach(function (entry) {
+      var i = visibleCells.indexOf(entry.target);
+      if (entry.isIntersecting) {
+        if (i < 0) { visibleCells.push(entry.target); }
+        if (liveCells.indexOf(entry.target) < 0) { hydrate(entry.target); }
+      } else if (i >= 0) {
+        visibleCells.splice(i, 1);
+      }
+    });
+    enforceCap();
+  }, {rootMargin: '$root_margin'});
+
+  cells.forEach(function (cell) { observer.observe(cell); });
+})();
+</script>''')
+
+# Loads plotly.js once ahead of a lazy grid, for the include_plotlyjs modes of plotly's to_html
+PLOTLYJS_SOURCES = {
+    'cdn': 'https://cdn.plot.ly/plotly-latest.min.js',
+    'directory': 'plotly.min.js',
+}
+
+
+def get_plotlyjs_include_html(include_plotlyjs) -> str:
+    """
+    Returns the HTML that loads plotly.js, as specified by plotly's to_html include_plotlyjs
+    (True, 'cdn', 'directory', a path ending in '.js', or False).
+    """
+    if include_plotlyjs is True:
+        return f'<script type="text/javascript">{get_plotlyjs()}</script>'
+    elif include_plotlyjs is False:
+        return ''
+    elif include_plotlyjs in PLOTLYJS_SOURCES:
+        return f'<script src="{PLOTLYJS_SOURCES[include_plotlyjs]}"></script>'
+    elif isinstance(include_plotlyjs, str) and include_plotlyjs.endswith('.js'):
+        return f'<script src="{include_plotlyjs}"></script>'
+    else:
+        raise ValueError(f'Unsupported include_plotlyjs value {include_plotlyjs!r}')
+
+
+def html_div_grid(html_elements:list, table_width='98%', cell_padding='5px', columns=3,
+                  lazy=False, max_live_cells=24, lazy_cell_min_height='450px', lazy_root_margin='200px'):
+    """
+    Arranges HTML strings in a grid.
+
+    Parameters
+    ----------
+    html_elements: A list of HTML strings, one per cell
+    table_width: CSS width of the grid
+    cell_padding: CSS padding of each cell
+    columns: The number of cells per row
+    lazy: Keeps each cell's HTML inert in a <template> until the cell scrolls into view, so that large
+          grids open without parsing every cell (and running its scripts) up front.
+    max_live_cells: The most lazy cells that are hydrated at once. Cells that are out of view are
+                    emptied, least recently hydrated first, once there are more.
+    lazy_cell_min_height: CSS height of a lazy cell before it is hydrated. Cells need a height so that
+                          only the ones in view are hydrated, so this should be close to their content's.
+    lazy_root_margin: How far outside the viewport cells start to be hydrated, as a CSS margin
+
+    Returns
+    -------
+    An HTML string
+    """
+    assert max_live_cells >= 1, 'max_live_cells must be at least 1'
 
     def table_div(s):
         return f'<div style="width:{table_width}; display: table;">{s}</div>'
@@ -20,17 +144,68 @@ def html_div_grid(html_elements:list, table_width='98%', cell_padding='5px', col
     def cell_div(s):
         return f'<div style="width: {"{}%".format(round(100/len(html_elements)))}; display: table-cell; padding:{cell_padding}">{s}</div>'
 
+    def lazy_cell_div(s):
+        return f'<div data-lazy-cell style="min-height: {lazy_cell_min_height};"><template>{s}</template></div>'
+
     html_element_rows = [html_elements[i*columns:min(i*columns+columns, len(html_elements))] for i in range(0, len(html_elements)//columns+1)]
-    html_format = table_div(''.join(row_div(''.join(cell_div(e) for e in l)) for l in html_element_rows))
-    return html_format
 
+    if not lazy:
+        html_format = table_div(''.join(row_div(''.join(cell_div(e) for e in l)) for l in html_element_rows))
+        return html_format
+
+    _grid_id = f'lazy-grid-{uuid4().hex}'
+    _grid = table_div(''.join(row_div(''.join(cell_div(lazy_cell_div(e)) for e in l)) for l in html_element_rows))
+
+    return f'<div id="{_grid_id}">{_grid}</div>' + LAZY_GRID_SCRIPT.substitute(
+        grid_id=_grid_id,
+        max_live_cells=int(max_live_cells),
+        root_margin=lazy_root_margin,
+    )
+
+
+def plotly_div_grid(fig_list: list, include_plotlyjs=None, lazy=False, **kwargs):
+    """
+    Arranges plotly figures (or HTML strings) in a grid, see html_div_grid.
+
+    Parameters
+    ----------
+    fig_list: A list of plotly figures or HTML strings. Strings are used as-is.
+    include_plotlyjs: None renders each figure as a full HTML document with its own copy of plotly.js.
+                      Otherwise figures are rendered as divs, and plotly.js is only loaded once, with the
+                      first figure, as specified by plotly's to_html: True embeds the bundle, 'cdn'
+                      references the plotly CDN, 'directory' or a path ending in '.js' references a shared
+                      copy, and False leaves loading plotly.js to the page.
+    lazy: Only draws figures as they scroll into view, see html_div_grid. plotly.js is loaded once ahead
+          of the grid (embedded if include_plotlyjs is None), and each figure's JSON is kept inert until
+          its cell is hydrated.
+    kwargs: passed to html_div_grid
+
+    Returns
+    -------
+    An HTML string
+    """
+    if lazy:
+        _include_plotlyjs = True if include_plotlyjs is None else include_plotlyjs
+
+        return get_plotlyjs_include_html(_include_plotlyjs) + html_div_grid(
+            [e if isinstance(e, str) else e.to_html(include_plotlyjs=False, full_html=False) for e in fig_list],
+            lazy=True,
+            **kwargs,
+        )
+
+    _is_plotlyjs_included = False
 
-def plotly_div_grid(fig_list: list, **kwargs):
     def handle_element(e):
+        nonlocal _is_plotlyjs_included
+
         if isinstance(e, str):
             return e
-        else:
+        elif include_plotlyjs is None:
             return e.to_html()
+        else:
+            _html = e.to_html(include_plotlyjs=False if _is_plotlyjs_included else include_plotlyjs, full_html=False)
+            _is_plotlyjs_included = True
+            return _html
 
     return html_div_grid(
         [handle_element(fig) for fig in fig_list],
@@ -38,46 +213,154 @@ def plotly_div_grid(fig_list: list, **kwargs):
     )
 
 
+TABLE_RENDERERS = ['styler', 'fast']
+
+# Table styles of the metric status table, as (selector, [(property, value)]) pairs. The data cell font color is set
+# per table.
+METRIC_STATUS_TABLE_STYLES = [
+    ('*', [('all', 'revert')]),
+    ('.row_heading', [('display', 'none')]),
+    ('.col_heading', [('display', 'none')]),
+    ('.blank.level0', [('display', 'none')]),
+    ('tr', [('padding-bottom', '100em')]),
+    ('.data', [('font-family', 'Arial'), ('color', None), ('border-width', 0), ('padding-bottom', '.25em')]),
+]
+
+CURRENT_VALUE_FORMAT = '<p style="text-align: center">{:.0f}</p>'
+
+
+def render_metric_status_table_html(df: pd.DataFrame, font_color='#3C3C3C', formats: dict = None,
+                                    value_bar_column: str = None, value_bar_color='lightgray') -> str:
+    """
+    Writes a status table as HTML directly, with the same markup as the pandas Styler used by
+    convert_metric_status_table_to_html: the same table styles, hidden headers and index, cell
+    formats, and value bars drawn like Styler.bar(color=value_bar_color, vmin=0). Cells are
+    formatted a column at a time and rows are written from fixed templates, so rendering time
+    grows linearly with the number of rows.
+
+    Parameters
+    ----------
+    df: The table to render
+    font_color: Color of the table text
+    formats: Format strings by column name. Other columns use the Styler default format: 6 decimal places
+             for floats, and str otherwise
+    value_bar_column: Optional column to draw value bars in
+    value_bar_color: Color of the value bars
+
+    Returns
+    -------
+    An HTML string
+    """
+    _formats = formats or {}
+    _uuid = uuid4().hex[:5]
+
+    def _format_values(values, format_string: str = None) -> list:
+        if format_string is not None:
+            return [format_string.format(x) for x in values]
+        else:
+            return [f'{x:.6f}' if is_float(x) or is_complex(x) else str(x) for x in values]
+
+    _style_lines = ['<style type="text/css">\n']
+    for selector, props in METRIC_STATUS_TABLE_STYLES:
+        _style_lines.append(f'#T_{_uuid} {selector} {{\n')
+        _style_lines.extend(
+            f'  {p}: {font_color if p == "color" and v is None else v};\n' for p, v in props
+        )
+        _style_lines.append('}\n')
+
+    if value_bar_column is not None:
+        _value_bar_column_position = list(df.columns).index(value_bar_column)
+        _values = df[value_bar_column].to_numpy()
+        # Empty or all-null columns have no bars, and only get the cell width
+        _right = np.nanmax(_values) if pd.notna(_values).any() else np.nan
+
+        # Bars run from 0 to the largest value, and values are clipped to that window like Styler.bar does
+        with np.errstate(invalid='ignore', divide='ignore'):
+            _clipped = np.where(_values < 0, 0, _values)
+            _clipped = np.where(_clipped > _right, _right, _clipped)
+            _ends = _clipped / _right
+
+        # Cells with the same CSS share a rule, in order of first appearance
+        _selectors_by_props = {}
+        for r, end in enumerate(_ends):
+            _props = ('width: 10em;',) + (
+                (f'background: linear-gradient(90deg, {value_bar_color} {end * 100:.1f}%, '
+                 f'transparent {end * 100:.1f}%);',) if end > 0 else ()
+            )
+            _selectors_by_props.setdefault(_props, []).append(f'#T_{_uuid}_row{r}_col{_value_bar_column_position}')
+
+        for props, selectors in _selectors_by_props.items():
+            _style_lines.append(', '.join(selectors) + ' {\n')
+            _style_lines.extend(f'  {p}\n' for p in props)
+            _style_lines.append('}\n')
+
+    _style_lines.append('</style>\n')
+
+    _header_cells = ''.join(
+        f'      <th id="T_{_uuid}_level0_col{c}" class="col_heading level0 col{c}" >{colname}</th>\n'
+        for c, colname in enumerate(_format_values(df.columns))
+    )
+
+    _index_cells = _format_values(df.index.tolist())
+    _columns = [_format_values(df[colname].tolist(), _formats.get(colname)) for colname in df.columns]
+
+    _row_template = ''.join(
+        [f'    <tr>\n      <th id="T_{_uuid}_level0_row{{r}}" class="row_heading level0 row{{r}}" >{{}}</th>\n'] +
+        [f'      <td id="T_{_uuid}_row{{r}}_col{c}" class="data row{{r}} col{c}" >{{}}</td>\n'
+         for c in range(len(df.columns))] +
+        ['    </tr>\n']
+    )
+
+    _rows = ''.join(
+        _row_template.format(*cells, r=r) for r, cells in enumerate(zip(_index_cells, *_columns))
+    )
+
+    return (
+        ''.join(_style_lines)
+        + f'<table id="T_{_uuid}">\n  <thead>\n    <tr>\n      <th class="blank level0" >&nbsp;</th>\n'
+        + _header_cells
+        + '    </tr>\n  </thead>\n  <tbody>\n'
+        + _rows
+        + '  </tbody>\n</table>\n'
+    )
+
+
 def convert_metric_status_table_to_html(df: pd.DataFrame, title=None, include_actionability_score=False,
                                         sort_records_by_actionability=False, sort_records_by_value=False,
                                         sort_records_by_name=False, auto_detect_percentages=False,
                                         limit_rows: int = None, font_color='#3C3C3C', title_color='#2A3F5F',
-                                        display_current_value_bars=True):
-
-    _df = df.copy()
+                                        display_current_value_bars=True, renderer='styler'):
+    """
+    Renders a table of metric status records (see MetricEvaluationPipeline.get_current_display_record) as HTML.
 
-    def format_urls(r):
-        _url = r.get('URL')
-        if _url:
-            return f'''<a href="{_url}" target="_blank" style="color: {title_color}"><b>{r['Metric']}</b></a>'''
-        else:
-            return f'''<b>{r['Metric']}</b>'''
+    renderer='styler' renders the table with a pandas Styler. renderer='fast' writes the same table
+    directly (see render_metric_status_table_html), which is much faster for tables with many rows.
+    """
+    assert renderer in TABLE_RENDERERS, f'renderer must be one of {TABLE_RENDERERS}, got {renderer!r}'
 
-    def format_current_value(r):
-        _current_value = r.get('Current Value')
-        if 0 < _current_value < 1:
-            return '<p style="text-align: center">{:.0f}%</p>'.format(_current_value*100)
-        else:
-            return '<p style="text-align: center">{:.0f}</p>'.format(_current_value)
+    _df = df.copy()
 
+    _metric = _df['Metric'].astype(str)
 
     if 'URL' in _df.columns:
-        _df['Metric'] = _df.apply(
-            func=format_urls,
-            axis=1,
-        )
+        _url = _df['URL']
+        _df['Metric'] = np.where(
+            _url.map(bool).to_numpy(dtype=bool),
+            '<a href="' + _url.astype(str) + f'" target="_blank" style="color: {title_color}"><b>' + _metric
+            + '</b></a>',
+            '<b>' + _metric + '</b>',
+        ) if len(_df.index) > 0 else _metric
         _df = _df.drop('URL', axis=1)
     else:
-        _df['Metric'] = _df.apply(
-            func=lambda r: f'''<b style="color: {title_color}">{r['Metric']}</b>''',
-            axis=1,
-        )
+        _df['Metric'] = f'<b style="color: {title_color}">' + _metric + '</b>'
 
     if auto_detect_percentages:
-        _df['Current Value'] = _df.apply(
-            func=format_current_value,
-            axis=1,
-        )
+        _current_value = _df['Current Value'].to_numpy()
+        _df['Current Value'] = np.where(
+            (0 < _current_value) & (_current_value < 1),
+            [f'<p style="text-align: center">{x * 100:.0f}%</p>' for x in _current_value],
+            [f'<p style="text-align: center">{x:.0f}</p>' for x in _current_value],
+        ) if len(_df.index) > 0 else _df['Current Value']
 
     if sort_records_by_actionability and sort_records_by_value:
         _df = _df.sort_values(by=['Actionability Score', 'Current Value'], ascending=False)
@@ -96,37 +379,33 @@ def convert_metric_status_table_to_html(df: pd.DataFrame, title=None, include_ac
     if limit_rows is not None:
         _df = _df.head(limit_rows)
 
-    _output = _df.style.set_table_styles(
-        [{'selector': '*',
-          'props': [('all', 'revert')]},
-         {'selector': '.row_heading',
-          'props': [('display', 'none')]},
-         {'selector': '.col_heading',
-          'props': [('display', 'none')]},
-         {'selector': '.blank.level0',
-          'props': [('display', 'none')]},
-         {'selector': 'tr',
-          'props': [('padding-bottom', '100em')]},
-         {'selector': '.data',
-          'props': [
-              ('font-family', 'Arial'),
-              ('color', font_color),
-              ('border-width', 0),
-              ('padding-bottom', '.25em'),
-          ]}]
-    ).format({
+    _formats = {
         'Metric': '{}',
-        'Current Value': '{}' if auto_detect_percentages else '<p style="text-align: center">{:.0f}</p>'
-    })
-
-    if display_current_value_bars and not auto_detect_percentages:
-        _output = _output.bar(
-            'Current Value',
-            color='lightgray',
-            vmin=0,
+        'Current Value': '{}' if auto_detect_percentages else CURRENT_VALUE_FORMAT,
+    }
+    _display_current_value_bars = display_current_value_bars and not auto_detect_percentages
+
+    if renderer == 'fast':
+        _output = render_metric_status_table_html(
+            _df,
+            font_color=font_color,
+            formats={colname: f for colname, f in _formats.items() if colname in _df.columns},
+            value_bar_column='Current Value' if _display_current_value_bars else None,
         )
+    else:
+        _output = _df.style.set_table_styles([
+            {'selector': selector, 'props': [(p, font_color if p == 'color' and v is None else v) for p, v in props]}
+            for selector, props in METRIC_STATUS_TABLE_STYLES
+        ]).format(_formats)
+
+        if _display_current_value_bars:
+            _output = _output.bar(
+                'Current Value',
+                color='lightgray',
+                vmin=0,
+            )
 
-    _output = _output.render(header=False, index=False)
+        _output = _output.render(header=False, index=False)
 
     if title is not None:
         _output = f'<h4 style="color: {title_color};">{title}</h4>' + _output
@@ -134,32 +413,116 @@ def convert_metric_status_table_to_html(df: pd.DataFrame, title=None, include_ac
     return _output
 
 
+def _build_metric_evaluation_pipeline(key, series, measure_name, metric_evaluation_pipeline_options):
+    return MetricEvaluationPipeline(
+        series,
+        metric_name=key,
+        measure_name=measure_name,
+        **metric_evaluation_pipeline_options,
+    )
+
+
+def _display_actionability_time_series(key, pipeline, measure_name, actionability_time_series_options):
+    return pipeline.display_actionability_time_series(
+        title=key,
+        metric_name=measure_name,
+        **actionability_time_series_options,
+    )
+
+
+def _get_current_display_record(key, pipeline, measure_name, get_current_display_record_options):
+    return pipeline.get_current_display_record(**get_current_display_record_options)
+
+
+def _build_and_display_actionability_time_series(key, series, measure_name, metric_evaluation_pipeline_options,
+                                                 actionability_time_series_options):
+    return _display_actionability_time_series(
+        key,
+        _build_metric_evaluation_pipeline(key, series, measure_name, metric_evaluation_pipeline_options),
+        measure_name,
+        actionability_time_series_options,
+    )
+
+
+def _build_and_get_current_display_record(key, series, measure_name, metric_evaluation_pipeline_options,
+                                          get_current_display_record_options):
+    return _get_current_display_record(
+        key,
+        _build_metric_evaluation_pipeline(key, series, measure_name, metric_evaluation_pipeline_options),
+        measure_name,
+        get_current_display_record_options,
+    )
+
+
 @dataclass
 class DatasetEvaluationGenerator:
+    """
+    Evaluates and displays a measure for each group of a grouping set.
+
+    Groups are evaluated one at a time by default. Set executor='thread' or executor='process'
+    to spread pipeline evaluation and rendering across a shared pool of max_workers workers,
+    sending chunksize groups to a process worker at a time; see executors.map_with_executor.
+    Process workers build and render each group's pipeline in the same task, so only the series
+    go out and only figures and records come back. Pipelines are not kept between calls in this
+    case, but their results are still reused through the results caches.
+
+    The series lookup, and the pipeline lookup for each set of pipeline options, are computed
+    once and reused by later calls, so df should not be modified after the generator is created.
+    With a cache_dir, pipeline results are also kept on disk and reused by later runs; see
+    MetricEvaluationPipeline.cache_dir.
+    """
 
     df: pd.DataFrame
     grouping_set: list
     index_column: str
     measure_column: str
     title_format_template: str = None
+    executor: str = 'serial'
+    max_workers: int = None
+    chunksize: int = 1
+    cache_dir: str = None
+
+    def __post_init__(self):
+        self._series_lookup = None
+        # (metric_evaluation_pipeline_options, pipeline lookup) pairs. Options can hold unhashable
+        # values like palettes, so they are matched by equality rather than used as dict keys.
+        self._pipeline_lookups = []
 
     def generate_grouping_set_series_lookup(self):
+        if self._series_lookup is not None:
+            return self._series_lookup
+
         def convert_to_tuple(x):
             if isinstance(x, str):
                 return (x, )
             else:
                 return tuple(x)
 
-        _df = self.df.copy().reset_index()
+        _grouping_set = list(self.grouping_set)
+
+        # Columns that are only available as index levels are moved into the frame
+        _df = self.df
+        if not set(_grouping_set + [self.index_column, self.measure_column]).issubset(_df.columns):
+            _df = _df.reset_index()
 
         _grouping_set_actuals = [
             convert_to_tuple(x) for x in list(
-                _df.groupby(self.grouping_set)
-                    .sum()[self.measure_column]
+                _df.groupby(_grouping_set)[self.measure_column]
+                    .sum()
                     .sort_values(ascending=False).index
             )
         ]
 
+        # A single pass sums the measure by group and period, and each group's series is a slice of it
+        _grouping_set_period_sums = _df.groupby(_grouping_set + [self.index_column], observed=True)[
+            self.measure_column
+        ].sum()
+
+        _grouping_set_series = {
+            convert_to_tuple(key): s.droplevel(_grouping_set)
+            for key, s in _grouping_set_period_sums.groupby(level=_grouping_set, sort=False)
+        }
+
         _output = {}
 
         for s in _grouping_set_actuals:
@@ -168,26 +531,55 @@ class DatasetEvaluationGenerator:
             else:
                 _key = self.title_format_template.format(*s)
 
-            _output[_key] = (
-                _df[(_df[self.grouping_set] == s).all(axis=1)]
-                    .groupby(self.index_column).sum()[self.measure_column]
-            )
+            # Groups without any dated rows have an empty series
+            _output[_key] = _grouping_set_series.get(s, _grouping_set_period_sums.iloc[:0].droplevel(_grouping_set))
+
+        self._series_lookup = _output
 
         return _output
 
+    def map_grouping_set(self, function, lookup: dict, *args) -> dict:
+        """
+        Calls function(key, lookup[key], measure_column, *args) for each group, using the configured executor.
+
+        Returns a dict of results with the keys and order of lookup.
+        """
+        return dict(zip(lookup.keys(), map_with_executor(
+            function,
+            lookup.keys(),
+            lookup.values(),
+            repeat(self.measure_column, len(lookup)),
+            *[repeat(arg, len(lookup)) for arg in args],
+            executor=self.executor,
+            max_workers=self.max_workers,
+            chunksize=self.chunksize,
+        )))
+
+    def _uses_process_workers(self) -> bool:
+        return self.executor == 'process' or isinstance(self.executor, ProcessPoolExecutor)
+
+    def _get_metric_evaluation_pipeline_options(self, metric_evaluation_pipeline_options=None) -> dict:
+        return dict(
+            {'cache_dir': self.cache_dir} if self.cache_dir else {},
+            **(metric_evaluation_pipeline_options or {}),
+        )
+
     def generate_grouping_set_metric_pipeline_lookup(self, metric_evaluation_pipeline_options=None):
-        _data_series_lookup = self.generate_grouping_set_series_lookup()
+        _metric_evaluation_pipeline_options = self._get_metric_evaluation_pipeline_options(
+            metric_evaluation_pipeline_options
+        )
 
-        _metric_evaluation_pipeline_options = (metric_evaluation_pipeline_options or {})
+        for options, pipeline_lookup in self._pipeline_lookups:
+            if options == _metric_evaluation_pipeline_options:
+                return pipeline_lookup
 
-        _pipeline_lookup = {
-            key: MetricEvaluationPipeline(
-                series,
-                metric_name=key,
-                measure_name=self.measure_column,
-                **_metric_evaluation_pipeline_options,
-            ) for key, series in _data_series_lookup.items()
-        }
+        _pipeline_lookup = self.map_grouping_set(
+            _build_metric_evaluation_pipeline,
+            self.generate_grouping_set_series_lookup(),
+            _metric_evaluation_pipeline_options,
+        )
+
+        self._pipeline_lookups.append((dict(_metric_evaluation_pipeline_options), _pipeline_lookup))
 
         return _pipeline_lookup
 
@@ -195,46 +587,81 @@ class DatasetEvaluationGenerator:
 
         _actionability_time_series_options = (actionability_time_series_options or {})
 
-        return [
-            pipeline.display_actionability_time_series(
-                title=key,
-                metric_name=self.measure_column,
-                **_actionability_time_series_options,
-            )
-            for key, pipeline in self.generate_grouping_set_metric_pipeline_lookup().items()
-        ]
+        if self._uses_process_workers():
+            # Sending pipelines to and from processes costs more than building them in the worker
+            return list(self.map_grouping_set(
+                _build_and_display_actionability_time_series,
+                self.generate_grouping_set_series_lookup(),
+                self._get_metric_evaluation_pipeline_options(),
+                _actionability_time_series_options,
+            ).values())
+
+        return list(self.map_grouping_set(
+            _display_actionability_time_series,
+            self.generate_grouping_set_metric_pipeline_lookup(),
+            _actionability_time_series_options,
+        ).values())
 
     def display_actionability_time_series_grid(self, actionability_time_series_options=None,
                                                plotly_div_grid_options=None):
-
+        """
+        Displays the actionability time series of every group in a grid. Set include_plotlyjs in
+        plotly_div_grid_options (e.g. {'include_plotlyjs': 'cdn'}) to load plotly.js once for the
+        whole grid instead of once per figure, and lazy (e.g. {'lazy': True}) to only draw the figures
+        as they scroll into view, see plotly_div_grid.
+        """
         _plotly_div_grid_options = (plotly_div_grid_options or {})
+        _actionability_time_series_options = (actionability_time_series_options or {})
+
+        if _plotly_div_grid_options.get('include_plotlyjs') is not None or _plotly_div_grid_options.get('lazy'):
+            # The grid renders the figures itself, so that plotly.js is only included once
+            _actionability_time_series_options = dict(_actionability_time_series_options, return_html=False)
 
         return plotly_div_grid(
             self.generate_actionability_time_series_figures(
-                actionability_time_series_options=actionability_time_series_options
+                actionability_time_series_options=_actionability_time_series_options
             ),
             **_plotly_div_grid_options
         )
 
-    def generate_actionability_summary_records(self, get_current_display_record_options=None):
+    def generate_actionability_summary_records(self, get_current_display_record_options=None,
+                                               metric_evaluation_pipeline_options=None):
 
         _get_current_display_record_options = (get_current_display_record_options or {})
 
-        return [
-            pipeline.get_current_display_record(
-                **_get_current_display_record_options
-            ) for key, pipeline in self.generate_grouping_set_metric_pipeline_lookup().items()
-        ]
+        # Summary records only use the current period, so the checks are only evaluated for it
+        _metric_evaluation_pipeline_options = dict(
+            {'evaluate_last_n_periods': 1},
+            **(metric_evaluation_pipeline_options or {}),
+        )
+
+        if self._uses_process_workers():
+            return list(self.map_grouping_set(
+                _build_and_get_current_display_record,
+                self.generate_grouping_set_series_lookup(),
+                self._get_metric_evaluation_pipeline_options(_metric_evaluation_pipeline_options),
+                _get_current_display_record_options,
+            ).values())
+
+        return list(self.map_grouping_set(
+            _get_current_display_record,
+            self.generate_grouping_set_metric_pipeline_lookup(
+                metric_evaluation_pipeline_options=_metric_evaluation_pipeline_options
+            ),
+            _get_current_display_record_options,
+        ).values())
 
     def display_actionability_summary_records(self,
                                               get_current_display_record_options=None,
-                                              convert_metric_status_table_to_html_options=None):
+                                              convert_metric_status_table_to_html_options=None,
+                                              metric_evaluation_pipeline_options=None):
 
         _convert_metric_status_table_to_html_options = (convert_metric_status_table_to_html_options or {})
         return convert_metric_status_table_to_html(
             pd.DataFrame.from_records(
                 self.generate_actionability_summary_records(
-                    get_current_display_record_options=get_current_display_record_options
+                    get_current_display_record_options=get_current_display_record_options,
+                    metric_evaluation_pipeline_options=metric_evaluation_pipeline_options,
                 )
             ),
             **_convert_metric_status_table_to_html_options
@@ -275,7 +702,9 @@ def make_metric_segmentation_grid_display(df: pd.DataFrame, index_column: str, m
 
 
 def make_metric_collection_display(metric_specifications: List[dict], title: str = None,
-                                   convert_metric_status_table_to_html_options: dict = None):
+                                   convert_metric_status_table_to_html_options: dict = None,
+                                   get_current_display_record_options: dict = None,
+                                   metric_evaluation_pipeline_options: dict = None):
     """
     A template function for generating a list of sparkline displays for
     independent time series.
@@ -285,6 +714,11 @@ def make_metric_collection_display(metric_specifications: List[dict], title: str
     metric_specifications: A list of dictionaries with keys time_series (pd.Series), name (str), and url (optional str)
     title: A (str) title for the display
     convert_metric_status_table_to_html_options: pass keyword arguments to convert_metric_status_table_to_html
+    get_current_display_record_options: pass keyword arguments to MetricEvaluationPipeline.get_current_display_record,
+                                        e.g. {'sparkline_backend': 'svg'} for lightweight sparklines
+    metric_evaluation_pipeline_options: pass keyword arguments to MetricEvaluationPipeline. The checks
+                                        are only evaluated for the current period unless
+                                        evaluate_last_n_periods is set here.
 
     Returns
     -------
@@ -295,16 +729,22 @@ def make_metric_collection_display(metric_specifications: List[dict], title: str
         _output[key] = value
         return _output
 
+    # Instead of the annotated time series chart, we're going to ask for the raw info
+    # for the current period to build up our KPI collection, so the checks only need
+    # to evaluate that period.
+    _metric_evaluation_pipeline_options = dict(
+        {'evaluate_last_n_periods': 1},
+        **(metric_evaluation_pipeline_options or {}),
+    )
+
     return convert_metric_status_table_to_html(pd.DataFrame([
         # Initialize a MetricEvaluationPipeline
         add_dict_key(
             MetricEvaluationPipeline(
                 s=kpi_dict['time_series'],
                 metric_name=kpi_dict['name'],
-                # Instead of the annotated time series chart,
-                # we're going to ask for the raw info for the
-                # current period to build up our KPI collection.
-            ).get_current_display_record(),
+                **_metric_evaluation_pipeline_options,
+            ).get_current_display_record(**(get_current_display_record_options or {})),
             'URL',
             kpi_dict.get('url'),
         )
@@ -416,7 +856,13 @@ class CumulativeTargetAttainmentDisplay:
             )
             )
 
-    def display_cumulative_attainment_chart(self, title=None, show_legend=False, enforce_non_negative_yaxis=True):
+    def display_cumulative_attainment_chart(self, title=None, show_legend=False, enforce_non_negative_yaxis=True,
+                                            render_mode='svg'):
+        """
+        Plots cumulative actual and target values with actionable periods. render_mode='webgl' (or 'auto' for
+        long target periods) draws the traces with WebGL, see get_scatter_trace_type.
+        """
+        _scatter = get_scatter_trace_type(render_mode, n_points=len(self.target_attainment_df.index))
 
         fig = go.Figure(
             layout=go.Layout(
@@ -429,7 +875,7 @@ class CumulativeTargetAttainmentDisplay:
 
         # plot cumulative target values
         fig.add_trace(
-            go.Scatter(
+            _scatter(
                 x=self.target_attainment_df.index,
                 y=self.target_attainment_df.target_cumulative,
                 mode='lines',
@@ -441,7 +887,7 @@ class CumulativeTargetAttainmentDisplay:
 
         # plot cumulative actual values
         fig.add_trace(
-            go.Scatter(
+            _scatter(
                 x=self.target_attainment_df.index,
                 y=self.target_attainment_df.actual_cumulative,
                 mode='lines',
@@ -453,7 +899,7 @@ class CumulativeTargetAttainmentDisplay:
 
         # plot actionable periods
         fig.add_trace(
-            go.Scatter(
+            _scatter(
                 x=self.target_attainment_df.index,
                 y=self.target_attainment_df.actionability_actuals,
                 text=self.target_attainment_df.actionability_hover_text,
@@ -462,15 +908,12 @@ class CumulativeTargetAttainmentDisplay:
                 hoverinfo="x+text",
                 marker=dict(
                     size=10,
-                    color=[
-                        map_actionability_score_to_color(
-                            score,
-                            good_palette=self.good_palette,
-                            bad_palette=self.bad_palette,
-                            ambiguous_palette=self.ambiguous_palette,
-                            neutral_color='rgba(255,255,255, 0)',
-                        ) for score in self.target_attainment_df.actionability_scores
-                    ]
+                    color=get_actionability_color_mapper(
+                        good_palette=self.good_palette,
+                        bad_palette=self.bad_palette,
+                        ambiguous_palette=self.ambiguous_palette,
+                        neutral_color='rgba(255,255,255, 0)',
+                    ).map_scores(self.target_attainment_df.actionability_scores),
                 ),
                 showlegend=show_legend,
             )
@@ -0,0 +1,77 @@
+"""
+Executors for spreading per-group work across cores.
+
+Pools are created on first use and kept for the life of the process, so notebooks that render
+many dashboard cells only pay the worker start-up cost once. Functions submitted to the 'process'
+executor and their arguments must be picklable, i.e. defined at module level.
+"""
+import atexit
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+
+EXECUTORS = ['serial', 'thread', 'process']
+
+_executor_pools = {}
+_executor_pools_lock = threading.Lock()
+
+
+def get_executor_pool(executor: str, max_workers: int = None) -> Executor:
+    """
+    Returns the shared pool for an executor type and worker count, creating it on first use.
+    """
+    assert executor in ['thread', 'process'], f'Only thread and process executors have pools, got {executor!r}'
+
+    _key = (executor, max_workers)
+
+    # Concurrent first calls must share one pool, rather than each creating (and leaking) their own
+    with _executor_pools_lock:
+        if _key not in _executor_pools:
+            if executor == 'thread':
+                _executor_pools[_key] = ThreadPoolExecutor(max_workers=max_workers)
+            else:
+                _executor_pools[_key] = ProcessPoolExecutor(max_workers=max_workers)
+
+        return _executor_pools[_key]
+
+
+@atexit.register
+def shutdown_executor_pools():
+    """
+    Shuts down every shared pool. Pools are recreated by the next call that needs them.
+    """
+    with _executor_pools_lock:
+        _pools = list(_executor_pools.values())
+        _executor_pools.clear()
+
+    for pool in _pools:
+        pool.shutdown()
+
+
+def map_with_executor(function, *iterables, executor='serial', max_workers: int = None,
+                      chunksize: int = 1) -> list:
+    """
+    Applies function to the zipped iterables, like map, and returns the results as a list in input order.
+
+    Parameters
+    ----------
+    function: the function to apply. Must be defined at module level for executor='process'
+    iterables: argument iterables, as for map
+    executor: 'serial' (in the calling thread), 'thread', 'process', or a concurrent.futures.Executor instance
+    max_workers: number of workers for the shared thread or process pool. None uses the pool default
+    chunksize: number of items sent to a process worker at a time. Larger chunks reduce inter-process
+               overhead when there are many small items
+
+    Returns
+    -------
+    A list of results
+    """
+    if isinstance(executor, Executor):
+        return list(executor.map(function, *iterables, chunksize=chunksize))
+
+    assert executor in EXECUTORS, f'executor must be one of {EXECUTORS} or an Executor, got {executor!r}'
+    assert chunksize >= 1, 'chunksize must be at least 1'
+
+    if executor == 'serial':
+        return list(map(function, *iterables))
+
+    return list(get_executor_pool(executor, max_workers).map(function, *iterables, chunksize=chunksize))
@@ -112,3 +112,95 @@ def map_sign_to_string(x: float, labels: list = None):
         return _labels[2]
     else:
         return _labels[1]
+
+
+def combine_actionability_score_arrays(scores: np.ndarray) -> dict:
+    """
+    Combines the actionability scores of several metric checks, one column per check, into a
+    general actionability score for each row. Null scores (checks that were not evaluated) are ignored.
+
+    Parameters
+    ----------
+    scores: A 2-D array of actionability scores with one row per period and one column per check
+
+    Returns
+    -------
+    A dictionary of arrays with one value per row:
+        general_actionability_score: the score farthest from zero (the first one on ties), null if every score is null
+        is_valence_ambiguous: True if at least two scores have different signs
+    """
+    _scores = np.asarray(scores, dtype=float)
+
+    with np.errstate(invalid='ignore'):
+        _magnitude = np.where(np.isnan(_scores), -np.inf, np.abs(_scores))
+        _general_actionability_score = np.take_along_axis(
+            _scores, np.argmax(_magnitude, axis=1)[:, np.newaxis], axis=1
+        )[:, 0] if _scores.shape[1] > 0 else np.full(len(_scores), np.nan)
+
+        _is_valence_ambiguous = (_scores > 0).any(axis=1) & (_scores < 0).any(axis=1)
+
+    return {
+        'general_actionability_score': _general_actionability_score,
+        'is_valence_ambiguous':        _is_valence_ambiguous,
+    }
+
+
+def largest_triangle_three_buckets(x: np.ndarray, y: np.ndarray, max_points: int, keep: np.ndarray = None) -> np.ndarray:
+    """
+    Selects up to max_points points of a line that preserve its visual shape, using the
+    largest-triangle-three-buckets algorithm: the first and last points are kept, and the points
+    in between are split into equal buckets, from each of which the point forming the largest
+    triangle with the previously selected point and the average of the next bucket is kept.
+
+    Parameters
+    ----------
+    x: numeric x values, in increasing order
+    y: y values, without nulls
+    max_points: the number of points to select, at least 3
+    keep: optional boolean array of points that are always selected. Kept points count towards
+          max_points, but if there are more than max_points - 3 of them they are all selected anyway.
+
+    Returns
+    -------
+    A sorted array of the positions of the selected points.
+    """
+    assert max_points >= 3, 'max_points must be at least 3'
+
+    _x = np.asarray(x, dtype=float)
+    _y = np.asarray(y, dtype=float)
+    _n_points = len(_y)
+    _keep = np.zeros(_n_points, dtype=bool) if keep is None else np.asarray(keep, dtype=bool)
+
+    _n_selected = max(max_points - int(_keep.sum()), 3)
+
+    if _n_points <= _n_selected:
+        return np.arange(_n_points)
+
+    # Shift x to start at 0, which keeps the areas accurate for large values like nanosecond timestamps
+    _x = _x - _x[0]
+
+    # Bucket boundaries of the points between the first and last point
+    _bucket_edges = (np.arange(_n_selected - 1) * (_n_points - 2) / (_n_selected - 2)).astype(int) + 1
+    _bucket_edges[-1] = _n_points - 1
+
+    _selected = np.empty(_n_selected, dtype=int)
+    _selected[0], _selected[-1] = 0, _n_points - 1
+
+    for i in range(_n_selected - 2):
+        _start, _end = _bucket_edges[i], _bucket_edges[i + 1]
+
+        # The next bucket is represented by its average point, and the last point follows the last bucket
+        if i + 2 < len(_bucket_edges):
+            _next_start, _next_end = _bucket_edges[i + 1], _bucket_edges[i + 2]
+        else:
+            _next_start, _next_end = _n_points - 1, _n_points
+        _next_x, _next_y = _x[_next_start:_next_end].mean(), _y[_next_start:_next_end].mean()
+
+        _previous = _selected[i]
+        _areas = np.abs(
+            (_x[_previous] - _next_x) * (_y[_start:_end] - _y[_previous])
+            - (_x[_previous] - _x[_start:_end]) * (_next_y - _y[_previous])
+        )
+        _selected[i + 1] = _start + int(np.argmax(_areas))
+
+    return np.union1d(_selected, np.flatnonzero(_keep))
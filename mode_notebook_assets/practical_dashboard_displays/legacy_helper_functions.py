@@ -1,4 +1,7 @@
 import base64
+import threading
+from dataclasses import dataclass
+from functools import lru_cache
 from io import BytesIO
 
 import numpy as np
@@ -7,30 +10,131 @@ import matplotlib
 
 matplotlib.use('agg')
 from matplotlib import pyplot as plt
-from plotly import express as px
+from plotly import express as px, graph_objects as go
 
 
-def map_actionability_score_to_color(x: float, is_valence_ambiguous=False, is_higher_good=True, is_lower_good=False,
-                                     good_palette=None, bad_palette=None, ambiguous_palette=None, neutral_color=None):
-    _good_palette = list(good_palette or px.colors.sequential.Greens[3:-2])
-    _bad_palette = list(bad_palette or px.colors.sequential.Reds[3:-2])
-    _ambiguous_palette = list(ambiguous_palette or ['rgb(255,174,66)'])
-    _neutral_color = neutral_color or 'rgb(211,211,211)'
+def convert_rgb_color_to_hex(color: str) -> str:
+    """
+    Converts an 'rgb(r,g,b)' color string to '#rrggbb'. Other color strings are returned unchanged.
+    """
+    if not color.startswith('rgb('):
+        return color
 
-    if pd.isnull(x):
-        return _ambiguous_palette[-1]
+    return '#%02x%02x%02x' % tuple(int(s) for s in color.replace('rgb(', '').replace(')', '').split(','))
 
-    if x == 0:
-        return _neutral_color
-    elif is_valence_ambiguous:
-        return _ambiguous_palette[
-            int(min(np.floor(np.abs(x) * (len(_ambiguous_palette) - 1)), len(_ambiguous_palette) - 1))]
-    else:
-        _is_good = (is_higher_good and x > 0) or (is_lower_good and x < 0)
-        if _is_good:
-            return _good_palette[int(min(np.floor(np.abs(x) * (len(_good_palette) - 1)), len(_good_palette) - 1))]
-        else:
-            return _bad_palette[int(min(np.floor(np.abs(x) * (len(_bad_palette) - 1)), len(_bad_palette) - 1))]
+
+@dataclass
+class ActionabilityColorMapper:
+    """
+    Maps actionability scores to colors for one configuration of palettes and valence. Palettes are
+    resolved (defaults included) and converted to arrays once, along with the hex version of every
+    color, so that whole arrays of scores can be mapped in a single vectorized call.
+    Use get_actionability_color_mapper to reuse mappers across calls.
+
+    Parameters
+    ----------
+    good_palette: Colors for good scores, from least to most actionable
+    bad_palette: Colors for bad scores, from least to most actionable
+    ambiguous_palette: Colors for scores with ambiguous valence; the last color is also used for null scores
+    neutral_color: Color for scores of zero
+    is_higher_good: boolean valence metadata for metric interpretation
+    is_lower_good: boolean valence metadata for metric interpretation
+    """
+    good_palette: list = None
+    bad_palette: list = None
+    ambiguous_palette: list = None
+    neutral_color: str = None
+    is_higher_good: bool = True
+    is_lower_good: bool = False
+
+    def __post_init__(self):
+        self._good_palette = np.array(list(self.good_palette or px.colors.sequential.Greens[3:-2]), dtype=object)
+        self._bad_palette = np.array(list(self.bad_palette or px.colors.sequential.Reds[3:-2]), dtype=object)
+        self._ambiguous_palette = np.array(list(self.ambiguous_palette or ['rgb(255,174,66)']), dtype=object)
+        self._neutral_color = self.neutral_color or 'rgb(211,211,211)'
+
+        self._hex_colors = {
+            color: convert_rgb_color_to_hex(color) for color in
+            [self._neutral_color, *self._good_palette, *self._bad_palette, *self._ambiguous_palette]
+        }
+
+    def map_scores(self, scores, is_valence_ambiguous=False, hex_colors=False) -> list:
+        """
+        Maps scores to colors, the same way as map_actionability_score_to_color maps a single score.
+
+        Parameters
+        ----------
+        scores: An array of actionability scores
+        is_valence_ambiguous: An array of valence ambiguity flags, or a single flag for every score
+        hex_colors: if true, return '#rrggbb' colors instead of the palette color strings
+
+        Returns
+        -------
+        A list of colors, one per score.
+        """
+        _scores = np.asarray(scores, dtype=float).reshape(-1)
+        _is_valence_ambiguous = np.broadcast_to(np.asarray(is_valence_ambiguous, dtype=bool), _scores.shape)
+
+        _is_null = np.isnan(_scores)
+        _magnitude = np.abs(np.where(_is_null, 0, _scores))
+        _is_good = (self.is_higher_good & (_scores > 0)) | (self.is_lower_good & (_scores < 0))
+
+        def _palette_colors(palette):
+            _index = np.minimum(np.floor(_magnitude * (len(palette) - 1)), len(palette) - 1)
+            return palette[np.where(np.isfinite(_index), _index, len(palette) - 1).astype(int)]
+
+        _colors = np.select(
+            [_is_null, _scores == 0, _is_valence_ambiguous, _is_good],
+            [self._ambiguous_palette[-1], self._neutral_color,
+             _palette_colors(self._ambiguous_palette), _palette_colors(self._good_palette)],
+            default=_palette_colors(self._bad_palette),
+        ).tolist()
+
+        if hex_colors:
+            return [self._hex_colors[color] for color in _colors]
+
+        return _colors
+
+
+@lru_cache(maxsize=None)
+def _get_actionability_color_mapper(good_palette: tuple, bad_palette: tuple, ambiguous_palette: tuple,
+                                    neutral_color: str, is_higher_good: bool,
+                                    is_lower_good: bool) -> ActionabilityColorMapper:
+    return ActionabilityColorMapper(
+        good_palette=list(good_palette) if good_palette is not None else None,
+        bad_palette=list(bad_palette) if bad_palette is not None else None,
+        ambiguous_palette=list(ambiguous_palette) if ambiguous_palette is not None else None,
+        neutral_color=neutral_color,
+        is_higher_good=is_higher_good,
+        is_lower_good=is_lower_good,
+    )
+
+
+def get_actionability_color_mapper(good_palette=None, bad_palette=None, ambiguous_palette=None, neutral_color=None,
+                                   is_higher_good=True, is_lower_good=False) -> ActionabilityColorMapper:
+    """
+    Returns the ActionabilityColorMapper for a configuration of palettes and valence, building it
+    on first use and reusing it afterwards.
+    """
+    def _as_key(palette):
+        return tuple(palette) if palette is not None else None
+
+    return _get_actionability_color_mapper(
+        _as_key(good_palette), _as_key(bad_palette), _as_key(ambiguous_palette), neutral_color,
+        bool(is_higher_good), bool(is_lower_good),
+    )
+
+
+def map_actionability_score_to_color(x: float, is_valence_ambiguous=False, is_higher_good=True, is_lower_good=False,
+                                     good_palette=None, bad_palette=None, ambiguous_palette=None, neutral_color=None):
+    return get_actionability_color_mapper(
+        good_palette=good_palette,
+        bad_palette=bad_palette,
+        ambiguous_palette=ambiguous_palette,
+        neutral_color=neutral_color,
+        is_higher_good=is_higher_good,
+        is_lower_good=is_lower_good,
+    ).map_scores([x], is_valence_ambiguous=is_valence_ambiguous)[0]
 
 
 def map_actionability_score_to_description(x: float, is_valence_ambiguous=False, is_higher_good=True,
@@ -53,6 +157,26 @@ def map_actionability_score_to_description(x: float, is_valence_ambiguous=False,
                 return 'Actionably Bad'
 
 
+def map_actionability_scores_to_descriptions(x: np.ndarray, is_valence_ambiguous: np.ndarray = False,
+                                             is_higher_good=True, is_lower_good=False) -> np.ndarray:
+    """
+    Vectorized equivalent of map_actionability_score_to_description for an array of scores and an
+    array (or scalar) of valence ambiguity flags. Returns an array of descriptions.
+    """
+    _x = np.asarray(x, dtype=float)
+    _is_valence_ambiguous = np.asarray(is_valence_ambiguous, dtype=bool)
+
+    with np.errstate(invalid='ignore'):
+        _is_good = (is_higher_good & (_x > 0)) | (is_lower_good & (_x < 0))
+        _is_beyond_l2 = np.abs(_x) > 1
+
+        return np.select(
+            [_x == 0, _is_valence_ambiguous, _is_good & _is_beyond_l2, _is_good, _is_beyond_l2],
+            ['Within a Normal Range', 'Ambiguous', 'Extraordinary', 'Actionably Good', 'Crisis'],
+            default='Actionably Bad',
+        )
+
+
 def map_threshold_labels_to_name_by_configuration(label: str, is_higher_good=True, is_lower_good=False):
     is_high = 'high' in label
     is_low = 'low' in label
@@ -71,59 +195,199 @@ def map_threshold_labels_to_name_by_configuration(label: str, is_higher_good=Tru
         return label
 
 
-def sparkline(data, point_marker='.', point_size=6, point_alpha=1.0, figsize=(4, 0.25), **kwargs):
+SPARKLINE_BACKENDS = ['matplotlib', 'svg']
+
+# Resolution of the matplotlib figures, used to convert figsize (inches) and sizes in points to pixels
+SPARKLINE_DPI = 100
+
+# pyplot keeps global figure state, so matplotlib images are rendered one at a time across threads
+_pyplot_lock = threading.Lock()
+
+
+def sparkline(data, point_marker='.', point_size=6, point_alpha=1.0, figsize=(4, 0.25), backend='matplotlib',
+              **kwargs):
     """
     Create a single HTML image tag containing a base64 encoded
     sparkline style plot.
 
+    With backend='svg', the sparkline is an inline SVG element built directly from the data
+    instead, with the same size, layout and emphasized last point. kwargs are matplotlib line
+    properties and only apply to the matplotlib backend.
+
     Forked from https://github.com/crdietrich/sparklines on 2020-12-22.
     """
+    assert backend in SPARKLINE_BACKENDS, f'backend must be one of {SPARKLINE_BACKENDS}, got {backend!r}'
 
     data = list(data)
 
-    fig = plt.figure(figsize=figsize)  # set figure size to be small
-    ax = fig.add_subplot(111)
-    plot_len = len(data)
-    point_x = plot_len - 1
+    if backend == 'svg':
+        return svg_sparkline(data, point_marker=point_marker, point_size=point_size, point_alpha=point_alpha,
+                             figsize=figsize)
 
-    plt.plot(data, linewidth=2, color='gray', **kwargs)
+    with _pyplot_lock:
+        fig = plt.figure(figsize=figsize)  # set figure size to be small
+        ax = fig.add_subplot(111)
+        plot_len = len(data)
+        point_x = plot_len - 1
 
-    # turn off all axis annotations
-    ax.axis('off')
+        plt.plot(data, linewidth=2, color='gray', **kwargs)
 
-    # plot the right-most point larger
-    plt.plot(point_x, data[point_x], color='gray',
-             marker=point_marker, markeredgecolor='gray',
-             markersize=point_size,
-             alpha=point_alpha, clip_on=False)
+        # turn off all axis annotations
+        ax.axis('off')
 
-    # squeeze axis to the edges of the figure
-    fig.subplots_adjust(left=0)
-    fig.subplots_adjust(right=0.99)
-    fig.subplots_adjust(bottom=0.1)
-    fig.subplots_adjust(top=0.9)
+        # plot the right-most point larger
+        plt.plot(point_x, data[point_x], color='gray',
+                 marker=point_marker, markeredgecolor='gray',
+                 markersize=point_size,
+                 alpha=point_alpha, clip_on=False)
+
+        # squeeze axis to the edges of the figure
+        fig.subplots_adjust(left=0)
+        fig.subplots_adjust(right=0.99)
+        fig.subplots_adjust(bottom=0.1)
+        fig.subplots_adjust(top=0.9)
+
+        # save the figure to html
+        bio = BytesIO()
+        plt.savefig(bio)
+        plt.close()
 
-    # save the figure to html
-    bio = BytesIO()
-    plt.savefig(bio)
-    plt.close()
     html = """<img style="width=100%%;height=auto" src="data:image/png;base64,%s"/>""" % base64.b64encode(bio.getvalue()).decode('utf-8')
     return html
 
 
-def dot(color='gray', figsize=(.5, .5), title_text=None, **kwargs):
+def svg_sparkline(data, point_marker='.', point_size=6, point_alpha=1.0, figsize=(4, 0.25)):
+    """
+    Create an inline SVG sparkline, laid out like the matplotlib sparkline: a figsize
+    (in inches) image, with the plot squeezed to the same edges, 5% margins around the
+    data, a line break at null values and a larger right-most point.
+
+    Returns an HTML string.
+    """
+    _width, _height = figsize[0] * SPARKLINE_DPI, figsize[1] * SPARKLINE_DPI
+    _points_to_pixels = SPARKLINE_DPI / 72
+
+    # Plot area, matching fig.subplots_adjust(left=0, right=.99, bottom=.1, top=.9) in SVG coordinates
+    _left, _right, _top, _bottom = 0, .99 * _width, .1 * _height, .9 * _height
+
+    _values = np.asarray(data, dtype=float)
+    _is_valid = ~np.isnan(_values)
+
+    def _scale(values, low, high, pixel_low, pixel_high):
+        # Data limits with the default matplotlib margins of 5% of the data range
+        _low, _high = low - .05 * (high - low), high + .05 * (high - low)
+        if _high == _low:
+            return np.full(len(values), (pixel_low + pixel_high) / 2)
+        return pixel_low + (values - _low) / (_high - _low) * (pixel_high - pixel_low)
+
+    _x = _scale(np.arange(len(_values)), 0, max(len(_values) - 1, 0), _left, _right)
+    _y = _scale(
+        np.where(_is_valid, _values, 0),
+        _values[_is_valid].min() if _is_valid.any() else 0,
+        _values[_is_valid].max() if _is_valid.any() else 0,
+        _bottom,
+        _top,
+    )
+
+    # Start a new subpath after each null value
+    _path = ''.join(
+        f'{"L" if i > 0 and _is_valid[i - 1] else "M"}{_x[i]:.2f} {_y[i]:.2f}'
+        for i in np.flatnonzero(_is_valid)
+    )
+
+    _elements = [
+        f'<path d="{_path}" fill="none" stroke="gray" stroke-width="{2 * _points_to_pixels:.2f}" '
+        f'stroke-linejoin="round"/>'
+    ]
+
+    if len(_values) > 0 and _is_valid[-1]:
+        # matplotlib draws the '.' marker at half the marker size, plus a 1 point edge
+        _diameter = point_size * (.5 if point_marker == '.' else 1) + 1
+        _elements.append(
+            f'<circle cx="{_x[-1]:.2f}" cy="{_y[-1]:.2f}" r="{_diameter / 2 * _points_to_pixels:.2f}" '
+            f'fill="gray" fill-opacity="{point_alpha}"/>'
+        )
+
+    return (
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{_width:g}" height="{_height:g}" '
+        f'viewBox="0 0 {_width:g} {_height:g}" style="overflow:visible">{"".join(_elements)}</svg>'
+    )
+
+
+RENDER_MODES = ['svg', 'webgl', 'auto']
+
+# Charts with more points than this are drawn with WebGL when render_mode='auto'
+WEBGL_POINT_THRESHOLD = 5000
+
+
+def get_scatter_trace_type(render_mode='svg', n_points: int = 0):
+    """
+    Returns the plotly scatter trace class for a chart render mode: go.Scatter for 'svg', or the
+    WebGL-backed go.Scattergl for 'webgl', which stays responsive on pan and hover with tens of
+    thousands of points. 'auto' uses WebGL for charts with more than WEBGL_POINT_THRESHOLD points.
+
+    Browsers limit the number of WebGL contexts per page, so grids of many charts should prefer
+    'auto' over 'webgl'.
+    """
+    assert render_mode in RENDER_MODES, f'render_mode must be one of {RENDER_MODES}, got {render_mode!r}'
+
+    if render_mode == 'webgl' or (render_mode == 'auto' and n_points > WEBGL_POINT_THRESHOLD):
+        return go.Scattergl
+    else:
+        return go.Scatter
+
 
-    fig = plt.figure(figsize=figsize)  # set figure size to be small
-    ax = fig.add_subplot(111)
+DOT_BACKENDS = ['matplotlib', 'svg']
+
+
+@lru_cache(maxsize=256)
+def render_dot_body(color: str, figsize: tuple = (.5, .5), backend='matplotlib') -> str:
+    """
+    Renders the image of a status dot, without its title. Dots only vary by color and size,
+    so rendered bodies are cached and reused across rows.
+
+    Returns the src of an img tag for backend='matplotlib', or an SVG element for backend='svg'.
+    """
+    assert backend in DOT_BACKENDS, f'backend must be one of {DOT_BACKENDS}, got {backend!r}'
 
-    ax.add_artist(plt.Circle((.5, .5), .25, color=color))
+    if backend == 'svg':
+        # Same geometry as the matplotlib figure: a circle of radius .25 centered in the default subplot area
+        _width, _height = figsize[0] * 100, figsize[1] * 100
+        _left, _right, _bottom, _top = .125, .9, .11, .88
+        return (
+            f'<svg xmlns="http://www.w3.org/2000/svg" width="40" height="40" viewBox="0 0 {_width:g} {_height:g}" '
+            f'preserveAspectRatio="none"><ellipse cx="{(_left + _right) / 2 * _width:.2f}" '
+            f'cy="{(1 - (_bottom + _top) / 2) * _height:.2f}" rx="{.25 * (_right - _left) * _width:.2f}" '
+            f'ry="{.25 * (_top - _bottom) * _height:.2f}" fill="{color}"/></svg>'
+        )
 
-    # turn off all axis annotations
-    ax.axis('off')
+    with _pyplot_lock:
+        fig = plt.figure(figsize=figsize)  # set figure size to be small
+        ax = fig.add_subplot(111)
 
-    # save the figure to html
-    bio = BytesIO()
-    plt.savefig(bio, dpi=300)
-    plt.close()
-    html = f"""<img title="{'Hover text unavailable.' if title_text is None else title_text}" style="height:40px;width:40px;" src="data:image/png;base64,{base64.b64encode(bio.getvalue()).decode('utf-8')}"/>"""
-    return html
\ No newline at end of file
+        ax.add_artist(plt.Circle((.5, .5), .25, color=color))
+
+        # turn off all axis annotations
+        ax.axis('off')
+
+        # save the figure to html
+        bio = BytesIO()
+        plt.savefig(bio, dpi=300)
+        plt.close()
+
+    return f"data:image/png;base64,{base64.b64encode(bio.getvalue()).decode('utf-8')}"
+
+
+def dot(color='gray', figsize=(.5, .5), title_text=None, backend='matplotlib', **kwargs):
+    """
+    Create an HTML status dot with a title tooltip. backend='svg' draws the dot as an inline
+    SVG element instead of a matplotlib PNG. See render_dot_body.
+    """
+    _title = 'Hover text unavailable.' if title_text is None else title_text
+    _body = render_dot_body(color, tuple(figsize), backend=backend)
+
+    if backend == 'svg':
+        return f"""<span title="{_title}" style="display:inline-block;height:40px;width:40px;">{_body}</span>"""
+
+    html = f"""<img title="{_title}" style="height:40px;width:40px;" src="{_body}"/>"""
+    return html
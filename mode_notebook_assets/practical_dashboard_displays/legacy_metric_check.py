@@ -1,8 +1,157 @@
-from typing import Callable, Any
+from bisect import bisect_right
+from dataclasses import dataclass
+from typing import Callable, Any, List
 
 import numpy as np
 import pandas as pd
 
+from mode_notebook_assets.practical_dashboard_displays import legacy_metric_check_numba
+
+# Calculation engines:
+#   python: the reference point-in-time implementation, applied to each window
+#   numpy:  vectorized calculations over all windows at once
+#   numba:  compiled loops over all windows at once (requires numba)
+ENGINES = ['python', 'numpy', 'numba']
+
+# Statistical process control constants
+L1_NORMAL_RANGE_CONSTANT = 2.66
+L2_NORMAL_RANGE_CONSTANT = 3.99
+
+L1_SUDDEN_CHANGE_CONSTANT = 3.27
+L2_SUDDEN_CHANGE_CONSTANT = 4.905
+
+L1_LONG_RUN_ACTIONABILITY_THRESHOLD = 7
+L2_LONG_RUN_ACTIONABILITY_THRESHOLD = 9
+
+# Output columns of each check, in display order
+OUTSIDE_OF_NORMAL_RANGE_OUTPUT_COLUMNS = [
+    'normal_range_actionability_score',
+    'low_l2_threshold_value',
+    'low_l1_threshold_value',
+    'normal_range_rolling_baseline',
+    'high_l1_threshold_value',
+    'high_l2_threshold_value',
+]
+
+SUDDEN_CHANGE_OUTPUT_COLUMNS = [
+    'sudden_change_actionability_score',
+    'sudden_change_l1_threshold_value',
+    'sudden_change_l2_threshold_value',
+    'most_recent_period_change',
+]
+
+CHANGE_IN_STEADY_STATE_LONG_OUTPUT_COLUMNS = [
+    'change_in_steady_state_long_actionability_score',
+    'mean_of_historical_training_values',
+    'current_long_run',
+]
+
+
+def _validate_engine(engine: str) -> None:
+    assert engine in ENGINES, f'engine must be one of {ENGINES}, got {engine!r}'
+
+
+def _pandas_mean(values) -> float:
+    '''
+    Mean of the non-null values, computed by pd.Series.mean. The reference point-in-time checks
+    are defined by pandas' rounding, which decides ties between values and means.
+    '''
+    return pd.Series(values, dtype=float).mean()
+
+
+def _pandas_mean_of_pop_differences(values) -> float:
+    '''
+    Mean absolute difference between consecutive values, computed as abs(s - s.shift(1)).mean().
+    '''
+    _values_series = pd.Series(values, dtype=float)
+    return abs(_values_series - _values_series.shift(1)).mean()
+
+
+def _evaluation_start(n_periods: int, evaluate_last_n_periods: int = None) -> int:
+    '''
+    Position of the first period to evaluate when only the last evaluate_last_n_periods are evaluated.
+    '''
+    if evaluate_last_n_periods is None:
+        return 0
+
+    assert evaluate_last_n_periods > 0, f'evaluate_last_n_periods must be positive, got {evaluate_last_n_periods}'
+    return max(n_periods - evaluate_last_n_periods, 0)
+
+
+def calculate_window_bounds(is_valid: np.ndarray, minimum_periods: int, rolling_calculation_periods: Any,
+                            evaluate_last_n_periods: int = None) -> tuple:
+    '''
+    Defines the rolling or expanding window ending at each period, based on minimum_periods and
+    rolling_calculation_periods. Windows are evaluated under the same rules as pandas:
+    expanding windows once they contain minimum_periods non-null values, and rolling windows
+    once they are full and contain no nulls.
+
+    Works along the first axis, so `is_valid` may describe a single series or a 2-D array of series.
+    With evaluate_last_n_periods, only the windows ending at the last N periods are evaluated.
+
+    Returns a tuple of (window_start, window_end, is_evaluated), where the window ending at period i
+    covers periods [window_start[i], window_end[i]).
+    '''
+    _n_periods = is_valid.shape[0]
+    _cumulative_count = np.concatenate([np.zeros((1,) + is_valid.shape[1:], dtype=int), np.cumsum(is_valid, axis=0)])
+
+    _window_end = np.arange(1, _n_periods + 1)
+
+    if rolling_calculation_periods is not None:
+        _window_length = min(_n_periods, rolling_calculation_periods)
+        _window_start = np.maximum(_window_end - _window_length, 0)
+        _is_full_window = _window_end >= _window_length
+        _minimum_count = _window_length
+    else:
+        _window_start = np.zeros(_n_periods, dtype=int)
+        _is_full_window = np.ones(_n_periods, dtype=bool)
+        _minimum_count = minimum_periods
+
+    _is_evaluated = (
+        (_cumulative_count[_window_end] - _cumulative_count[_window_start] >= _minimum_count)
+        & np.reshape(_is_full_window, (_n_periods,) + (1,) * (is_valid.ndim - 1))
+    )
+    _is_evaluated[:_evaluation_start(_n_periods, evaluate_last_n_periods)] = False
+
+    return _window_start, _window_end, _is_evaluated
+
+
+def create_output_frame_for_rolling_period(func: Callable[[np.ndarray, int], dict],
+                                           s: pd.Series,
+                                           minimum_periods: int,
+                                           rolling_calculation_periods: Any,
+                                           raw=True,
+                                           evaluate_last_n_periods: int = None) -> pd.DataFrame:
+    '''
+    Performs a rolling or expanding calculation window calculation (func) based on
+    minimum_periods and rolling_calculation_periods.
+
+    func is called once per evaluated window and every key of the dictionary it returns
+    becomes a column of the output. With raw=True (the default) each window is passed to func
+    as a NumPy array view, otherwise as a pd.Series slice of s. With evaluate_last_n_periods, func
+    is only called for the windows ending at the last N periods.
+
+    Returns a DataFrame with the same index as s. Windows that are not evaluated are null.
+    '''
+    _values = s.to_numpy(dtype=float)
+
+    _window_start, _window_end, _is_evaluated = calculate_window_bounds(
+        ~np.isnan(_values),
+        minimum_periods=minimum_periods,
+        rolling_calculation_periods=rolling_calculation_periods,
+        evaluate_last_n_periods=evaluate_last_n_periods,
+    )
+
+    _records = [
+        func(
+            _values[start:end] if raw else s.iloc[start:end],
+            minimum_periods,
+        ) if is_evaluated else {}
+        for start, end, is_evaluated in zip(_window_start, _window_end, _is_evaluated)
+    ]
+
+    return pd.DataFrame(_records, index=s.index).astype(float)
+
 
 def create_output_column_for_rolling_period(func: Callable[[pd.Series, int], dict],
                                             df: pd.DataFrame,
@@ -15,258 +164,1008 @@ def create_output_column_for_rolling_period(func: Callable[[pd.Series, int], dic
     minimum_periods and rolling_calculation_periods.
 
     Creates column "derived_colname" which must be a key to a dictionary output by func.
+    Prefer create_output_frame_for_rolling_period, which keeps every key from a single
+    call of func per window.
 
     Side effects: Mutates df.
     '''
-    _apply_function = lambda x: func(x, minimum_periods)[derived_colname]
-    _apply_to_series = df[apply_to_colname]
+    df[derived_colname] = create_output_frame_for_rolling_period(
+        func,
+        df[apply_to_colname],
+        minimum_periods=minimum_periods,
+        rolling_calculation_periods=rolling_calculation_periods,
+        raw=False,
+    ).reindex(columns=[derived_colname])[derived_colname]
 
-    if rolling_calculation_periods is not None:
-        _runtime_rolling_calculation_periods = min(len(_apply_to_series), rolling_calculation_periods)
 
-        df[derived_colname] = _apply_to_series.rolling(_runtime_rolling_calculation_periods).apply(
-            _apply_function,
-            raw=False,
-        )
+def calculate_window_statistics(values: np.ndarray, minimum_periods: int, rolling_calculation_periods: Any,
+                                engine='numpy', evaluate_last_n_periods: int = None) -> dict:
+    '''
+    Computes the summary statistics used by the point-in-time checks for every rolling or expanding
+    window at once, using cumulative sums of the values and of the absolute first differences.
+    Windows follow calculate_window_bounds, and windows that are not evaluated (including rolling
+    windows shorter than minimum_periods) are flagged in `is_evaluated`.
 
-    else:
-        df[derived_colname] = _apply_to_series.expanding(minimum_periods).apply(
-            _apply_function,
-            raw=False,
-        )
+    Works along the first axis, so `values` may be a single series or a 2-D array of series.
+    With engine='numba', the statistics come from compiled running sums instead, one series at a time.
+    With evaluate_last_n_periods, only the windows ending at the last N periods are flagged as evaluated.
+
+    Returns a dictionary of arrays with the same shape as `values`:
+        is_evaluated, mean_of_historical_values, mean_of_pop_differences,
+        most_recent_value, previous_value
+    '''
+    _values = np.asarray(values, dtype=float)
+    _n_periods = _values.shape[0]
+
+    if engine == 'numba':
+        _kernel = legacy_metric_check_numba.get_compiled_kernel(legacy_metric_check_numba.window_statistics_kernel)
+        _output_keys = ['is_evaluated', 'mean_of_historical_values', 'mean_of_pop_differences', 'previous_value']
+        _series_values = np.reshape(_values, (_n_periods, int(np.prod(_values.shape[1:]))))
+        _outputs = [np.empty(_series_values.shape, dtype=bool)] + [
+            np.empty(_series_values.shape) for _ in _output_keys[1:]
+        ]
 
+        for j in range(_series_values.shape[1]):
+            _series_outputs = _kernel(
+                np.ascontiguousarray(_series_values[:, j]),
+                minimum_periods,
+                rolling_calculation_periods or 0,
+            )
+            for _output, _series_output in zip(_outputs, _series_outputs):
+                _output[:, j] = _series_output
+
+        _window_statistics = {key: np.reshape(o, _values.shape) for key, o in zip(_output_keys, _outputs)}
+        _window_statistics['is_evaluated'][:_evaluation_start(_n_periods, evaluate_last_n_periods)] = False
+        _window_statistics['most_recent_value'] = _values
+        return _window_statistics
+
+    _is_valid = ~np.isnan(_values)
+
+    # Window sums are differences of cumulative sums over the whole series, which lose precision as the
+    # cumulative sums grow. Sums are taken relative to the first valid value of each series, so that
+    # only the deviations from it accumulate, and the offset is added back to the means.
+    _offset = np.where(
+        _is_valid.any(axis=0),
+        np.take_along_axis(_values, np.argmax(_is_valid, axis=0)[np.newaxis], axis=0)[0] if _n_periods > 0 else 0,
+        0,
+    )
+    _filled_values = np.where(_is_valid, _values - _offset, 0)
+
+    _pop_differences = np.abs(_values[1:] - _values[:-1])
+    _is_valid_pop_difference = ~np.isnan(_pop_differences)
+    _filled_pop_differences = np.where(_is_valid_pop_difference, _pop_differences, 0)
+
+    def _padded_cumsum(x: np.ndarray, n_leading_zeros: int) -> np.ndarray:
+        return np.concatenate([np.zeros((n_leading_zeros,) + x.shape[1:]), np.cumsum(x, axis=0)])
+
+    # cumulative_x[i] is the sum of x over periods [0, i), so window sums are differences of two lookups.
+    # Differences are padded with an extra zero because the first period has no previous value.
+    _cumulative_count = _padded_cumsum(_is_valid, 1)
+    _cumulative_sum = _padded_cumsum(_filled_values, 1)
+    _cumulative_pop_difference_count = _padded_cumsum(_is_valid_pop_difference, 2)
+    _cumulative_pop_difference_sum = _padded_cumsum(_filled_pop_differences, 2)
+
+    _window_start, _window_end, _is_evaluated = calculate_window_bounds(
+        _is_valid,
+        minimum_periods=minimum_periods,
+        rolling_calculation_periods=rolling_calculation_periods,
+        evaluate_last_n_periods=evaluate_last_n_periods,
+    )
+
+    # The point-in-time checks return nulls for rolling windows shorter than minimum_periods
+    if rolling_calculation_periods is not None and min(_n_periods, rolling_calculation_periods) < minimum_periods:
+        _is_evaluated = np.zeros_like(_is_evaluated)
 
-def change_in_steady_state_long(s: pd.Series, minimum_periods=14) -> pd.DataFrame:
+    # Differences inside a window pair each period with its predecessor in the same window
+    _pop_difference_window_start = np.minimum(_window_start + 1, _window_end)
+
+    _count = _cumulative_count[_window_end] - _cumulative_count[_window_start]
+    _sum = _cumulative_sum[_window_end] - _cumulative_sum[_window_start]
+    _pop_difference_count = (
+        _cumulative_pop_difference_count[_window_end] - _cumulative_pop_difference_count[_pop_difference_window_start]
+    )
+    _pop_difference_sum = (
+        _cumulative_pop_difference_sum[_window_end] - _cumulative_pop_difference_sum[_pop_difference_window_start]
+    )
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        _mean_of_historical_values = _sum / _count + _offset
+        _mean_of_pop_differences = _pop_difference_sum / _pop_difference_count
+
+    # The previous value is only defined when it falls inside the same window
+    _previous_value = np.where(
+        np.reshape(_window_end - _window_start >= 2, (_n_periods,) + (1,) * (_values.ndim - 1)),
+        np.concatenate([np.full((1,) + _values.shape[1:], np.nan), _values[:-1]]),
+        np.nan,
+    )
+
+    return {
+        'is_evaluated':              _is_evaluated,
+        'mean_of_historical_values': _mean_of_historical_values,
+        'mean_of_pop_differences':   _mean_of_pop_differences,
+        'most_recent_value':         _values,
+        'previous_value':            _previous_value,
+    }
+
+
+@dataclass
+class WindowStatisticsState:
     '''
-    Assumptions: 14 periods or more, 50/50 split between historical series (baseline) and
-                 evaluation series (testing)
+    Running equivalent of calculate_window_statistics for a single series that grows one period
+    at a time. push adds the next period and statistics returns the statistics of the window
+    ending at the most recent period, matching the last row of calculate_window_statistics
+    over every period pushed so far. Both are O(1) for expanding and rolling windows.
+
+    Running counts and sums are kept for the values and for the absolute first differences.
+    Rolling windows keep their values in a ring buffer of rolling_calculation_periods slots. When the
+    window slides, the value leaving it and the difference that paired it with its successor are
+    subtracted from the sums. To keep floating point error from accumulating, the sums are recomputed
+    from the buffer each time it wraps around, which is O(1) per period amortized.
     '''
+    minimum_periods: int
+    rolling_calculation_periods: int = None
 
-    def _change_in_steady_state_long_point_in_time(values: pd.Series, local_minimum_n_periods: int):
-        values_series = values
-        L1_LONG_RUN_ACTIONABILITY_THRESHOLD = 7
-        L2_LONG_RUN_ACTIONABILITY_THRESHOLD = 9
+    def __post_init__(self):
+        self.n_periods = 0
+        self._count = 0
+        self._sum = 0.0
+        self._pop_difference_count = 0
+        self._pop_difference_sum = 0.0
+        self._most_recent_value = np.nan
+        self._previous_value = np.nan
 
-        if len(values) >= local_minimum_n_periods:
-            train_test_breakpoint_index = max(int(len(values) / 2), local_minimum_n_periods)
-            training_series = values_series[:train_test_breakpoint_index]
-            testing_series = values_series[train_test_breakpoint_index:]
+        if self.rolling_calculation_periods is not None:
+            self._ring_buffer = [np.nan] * self.rolling_calculation_periods
+            self._ring_buffer_position = 0
 
-            mean_of_historical_training_values = training_series.mean()
+    def push(self, value: float) -> None:
+        _value = float(value)
 
-            current_long_run = 0
-            last_value_greater_than_historical_mean = False
-            last_value_less_than_historical_mean = False
-            for x in testing_series:
-                current_value_greater_than_historical_mean = x > mean_of_historical_training_values
-                current_value_less_than_historical_mean = x < mean_of_historical_training_values
+        if self.n_periods > 0:
+            _pop_difference = abs(_value - self._most_recent_value)
+            if not np.isnan(_pop_difference):
+                self._pop_difference_count += 1
+                self._pop_difference_sum += _pop_difference
 
-                increment_long_run_check = (
-                        current_value_greater_than_historical_mean == last_value_greater_than_historical_mean
-                        and current_value_less_than_historical_mean == last_value_less_than_historical_mean
-                        and x != mean_of_historical_training_values
-                )
+        if not np.isnan(_value):
+            self._count += 1
+            self._sum += _value
 
-                if increment_long_run_check:
-                    current_long_run = current_long_run + 1
-                else:
-                    current_long_run = 0
+        if self.rolling_calculation_periods is not None:
+            self._slide_ring_buffer(_value)
 
-                last_value_greater_than_historical_mean = current_value_greater_than_historical_mean
-                last_value_less_than_historical_mean = current_value_less_than_historical_mean
+        self._previous_value = self._most_recent_value
+        self._most_recent_value = _value
+        self.n_periods += 1
 
-            change_in_steady_state_long_actionability_score = 0 if current_long_run < L1_LONG_RUN_ACTIONABILITY_THRESHOLD else (
-                    (-1 if last_value_less_than_historical_mean else 1) * (
-                    .01 + (current_long_run - L1_LONG_RUN_ACTIONABILITY_THRESHOLD) /
-                    (L2_LONG_RUN_ACTIONABILITY_THRESHOLD - L1_LONG_RUN_ACTIONABILITY_THRESHOLD))
-            )
+    def _slide_ring_buffer(self, value: float) -> None:
+        _window_length = self.rolling_calculation_periods
+        _position = self._ring_buffer_position
 
-            return {
-                # Actionability
-                'change_in_steady_state_long_actionability_score': change_in_steady_state_long_actionability_score,
+        if self.n_periods >= _window_length:
+            # The slot being overwritten holds the oldest value in the window
+            _outgoing_value = self._ring_buffer[_position]
+            if not np.isnan(_outgoing_value):
+                self._count -= 1
+                self._sum -= _outgoing_value
 
-                # Threshold
-                'mean_of_historical_training_values':              mean_of_historical_training_values,
+            _successor = self._ring_buffer[(_position + 1) % _window_length] if _window_length > 1 else value
+            _outgoing_pop_difference = abs(_successor - _outgoing_value)
+            if not np.isnan(_outgoing_pop_difference):
+                self._pop_difference_count -= 1
+                self._pop_difference_sum -= _outgoing_pop_difference
 
-                # Intermediate Values
-                'current_long_run':                                current_long_run,
-            }
+        self._ring_buffer[_position] = value
+        self._ring_buffer_position = (_position + 1) % _window_length
+
+        if self._ring_buffer_position == 0 and self.n_periods + 1 >= _window_length:
+            self._resynchronize_running_sums()
+
+    def _resynchronize_running_sums(self) -> None:
+        # Called when the buffer holds the window in order, oldest value first
+        _values = np.array(self._ring_buffer)
+        _pop_differences = np.abs(np.diff(_values))
+        _is_valid = ~np.isnan(_values)
+        _is_valid_pop_difference = ~np.isnan(_pop_differences)
 
+        self._count = int(_is_valid.sum())
+        self._sum = float(_values[_is_valid].sum())
+        self._pop_difference_count = int(_is_valid_pop_difference.sum())
+        self._pop_difference_sum = float(_pop_differences[_is_valid_pop_difference].sum())
+
+    def statistics(self) -> dict:
+        '''
+        Returns a dictionary of 0-d arrays with the keys of calculate_window_statistics.
+        '''
+        if self.rolling_calculation_periods is not None:
+            # Windows cover the whole series until it is rolling_calculation_periods long (see
+            # calculate_window_bounds), and are evaluated when they contain no nulls
+            _window_length = min(self.n_periods, self.rolling_calculation_periods)
+            _is_evaluated = (
+                _window_length > 0 and self._count >= _window_length and _window_length >= self.minimum_periods
+            )
         else:
+            _window_length = self.n_periods
+            _is_evaluated = self._count >= self.minimum_periods
+
+        with np.errstate(divide='ignore', invalid='ignore'):
             return {
-                'change_in_steady_state_long_actionability_score': None,
-                'mean_of_historical_training_values':              None,
-                'current_long_run':                                None,
+                'is_evaluated':              np.asarray(_is_evaluated),
+                'mean_of_historical_values': np.float64(self._sum) / self._count,
+                'mean_of_pop_differences':   np.float64(self._pop_difference_sum) / self._pop_difference_count,
+                'most_recent_value':         np.float64(self._most_recent_value),
+                'previous_value':            np.float64(self._previous_value if _window_length >= 2 else np.nan),
             }
 
+
+def create_batch_output_frame(df: pd.DataFrame, outputs: dict, output_columns: List[str]) -> pd.DataFrame:
+    '''
+    Assembles 2-D check outputs (periods x metrics) into a frame with the same index as df and
+    (metric, output column) MultiIndex columns. Each metric gets a period_value column followed
+    by output_columns, mirroring the single series checks.
+    '''
+    _n_periods, _n_metrics = df.shape
+    _output_columns = ['period_value'] + output_columns
+    _values = np.stack(
+        [df.to_numpy(dtype=float)] + [np.asarray(outputs[c], dtype=float) for c in output_columns],
+        axis=-1,
+    )
+
+    return pd.DataFrame(
+        np.reshape(_values, (_n_periods, _n_metrics * len(_output_columns))),
+        index=df.index,
+        columns=pd.MultiIndex.from_product([df.columns, _output_columns], names=['metric', 'output']),
+    )
+
+
+def _change_in_steady_state_long_point_in_time(values: np.ndarray, local_minimum_n_periods: int):
+    '''
+    Calculates the Change in Steady State (Long) check for a point in time.
+
+    This is the reference implementation; change_in_steady_state_long uses the equivalent
+    incremental calculation in _change_in_steady_state_long_incremental.
+    '''
+    values_series = np.asarray(values, dtype=float)
+
+    if len(values) >= local_minimum_n_periods:
+        train_test_breakpoint_index = max(int(len(values) / 2), local_minimum_n_periods)
+        training_series = values_series[:train_test_breakpoint_index]
+        testing_series = values_series[train_test_breakpoint_index:]
+
+        mean_of_historical_training_values = _pandas_mean(training_series)
+
+        current_long_run = 0
+        last_value_greater_than_historical_mean = False
+        last_value_less_than_historical_mean = False
+        for x in testing_series:
+            current_value_greater_than_historical_mean = x > mean_of_historical_training_values
+            current_value_less_than_historical_mean = x < mean_of_historical_training_values
+
+            increment_long_run_check = (
+                    current_value_greater_than_historical_mean == last_value_greater_than_historical_mean
+                    and current_value_less_than_historical_mean == last_value_less_than_historical_mean
+                    and x != mean_of_historical_training_values
+            )
+
+            if increment_long_run_check:
+                current_long_run = current_long_run + 1
+            else:
+                current_long_run = 0
+
+            last_value_greater_than_historical_mean = current_value_greater_than_historical_mean
+            last_value_less_than_historical_mean = current_value_less_than_historical_mean
+
+        change_in_steady_state_long_actionability_score = 0 if current_long_run < L1_LONG_RUN_ACTIONABILITY_THRESHOLD else (
+                (-1 if last_value_less_than_historical_mean else 1) * (
+                .01 + (current_long_run - L1_LONG_RUN_ACTIONABILITY_THRESHOLD) /
+                (L2_LONG_RUN_ACTIONABILITY_THRESHOLD - L1_LONG_RUN_ACTIONABILITY_THRESHOLD))
+        )
+
+        return {
+            # Actionability
+            'change_in_steady_state_long_actionability_score': change_in_steady_state_long_actionability_score,
+
+            # Threshold
+            'mean_of_historical_training_values':              mean_of_historical_training_values,
+
+            # Intermediate Values
+            'current_long_run':                                current_long_run,
+        }
+
+    else:
+        return {
+            'change_in_steady_state_long_actionability_score': None,
+            'mean_of_historical_training_values':              None,
+            'current_long_run':                                None,
+        }
+
+
+def _change_in_steady_state_long_from_long_runs(most_recent_value: np.ndarray,
+                                                mean_of_historical_training_values: np.ndarray,
+                                                current_long_run: np.ndarray) -> dict:
+    '''
+    Vectorized scoring step of _change_in_steady_state_long_point_in_time, given the training mean
+    and the current long run of each window. Windows without a long run are null.
+    '''
+    change_in_steady_state_long_actionability_score = np.where(
+        current_long_run < L1_LONG_RUN_ACTIONABILITY_THRESHOLD,
+        0,
+        np.where(most_recent_value < mean_of_historical_training_values, -1, 1) * (
+                .01 + (current_long_run - L1_LONG_RUN_ACTIONABILITY_THRESHOLD) /
+                (L2_LONG_RUN_ACTIONABILITY_THRESHOLD - L1_LONG_RUN_ACTIONABILITY_THRESHOLD))
+    )
+
+    return {
+        'change_in_steady_state_long_actionability_score': np.where(
+            np.isnan(current_long_run), np.nan, change_in_steady_state_long_actionability_score
+        ),
+        'mean_of_historical_training_values':              mean_of_historical_training_values,
+        'current_long_run':                                current_long_run,
+    }
+
+
+def _training_mean_tolerance(breakpoint: int, count: int, absolute_sum: float, non_integer_count: int,
+                             mean: float) -> float:
+    '''
+    Bound on the difference between a training mean computed from running sums and the same mean
+    computed by pd.Series.mean, from the rounding error of both sums and of the division. Sums of
+    integers below 2 ** 53 are exact in any order, so their bound is 0.
+    '''
+    if non_integer_count == 0 and absolute_sum < 2 ** 53:
+        return 0.0
+
+    _eps = np.finfo(float).eps
+    return 2 * breakpoint * _eps * absolute_sum / count + 2 * _eps * abs(mean)
+
+
+@dataclass
+class ChangeInSteadyStateLongState:
+    '''
+    Running state of the Change in Steady State (Long) check for a single series that grows one
+    period at a time. push adds the next period and long_run returns the training mean and the
+    current long run of the expanding window ending at the most recent period.
+
+    The training mean comes from running sums up to the train/test breakpoint. The long run is the
+    number of periods since the run of values on the same side of the training mean started (or since
+    the breakpoint, whichever is later). Two monotonic stacks track the candidates for "the most recent
+    value at or below / at or above a threshold", so finding where the run starts is a binary search
+    as the breakpoint (and therefore the training mean) moves, rather than a walk over the whole
+    testing half. Each period costs O(log n) amortized.
+
+    Nulls are on neither side of the training mean and never equal to it, so in the reference
+    implementation a null continues a run of nulls (or a value equal to the mean, or the start of the
+    testing half) and breaks any other run. The indices of the most recent null and non-null values
+    are enough to reproduce this, so nulls cost the same as other values.
+
+    The running sums round differently from pd.Series.mean, which defines the training mean in the
+    reference implementation. When a value that decides the long run is within the rounding error
+    of the running mean, the training mean is recomputed as pandas computes it, so that ties with
+    the mean are decided the same way.
+    '''
+    minimum_periods: int
+
+    def __post_init__(self):
+        self._values = []
+        self._cumulative_count = [0]
+        self._cumulative_sum = [0.0]
+        self._cumulative_absolute_sum = [0.0]
+        self._cumulative_non_integer_count = [0]
+        self._last_null_index = -1
+        self._last_valid_index = -1
+
+        # Values with nulls as zeros, as pd.Series.mean sums them, grown by doubling
+        self._filled_values = np.zeros(16)
+
+        # Stack of indices whose values strictly increase from bottom to top, so the top-most entry at or
+        # below a threshold is the most recent period at or below it. The second stack mirrors this for
+        # "at or above", storing negated values so that both can be searched with bisect_right.
+        # Nulls are left out of both.
+        self._at_or_below_indices, self._at_or_below_values = [], []
+        self._at_or_above_indices, self._at_or_above_negated_values = [], []
+
+    @property
+    def n_periods(self) -> int:
+        return len(self._values)
+
+    @property
+    def most_recent_value(self) -> float:
+        return self._values[-1] if self._values else np.nan
+
+    def push(self, value: float) -> None:
+        x = float(value)
+        i = len(self._values)
+        _is_valid = not np.isnan(x)
+
+        self._values.append(x)
+        self._cumulative_count.append(self._cumulative_count[-1] + _is_valid)
+        self._cumulative_sum.append(self._cumulative_sum[-1] + (x if _is_valid else 0.0))
+        self._cumulative_absolute_sum.append(self._cumulative_absolute_sum[-1] + (abs(x) if _is_valid else 0.0))
+        self._cumulative_non_integer_count.append(
+            self._cumulative_non_integer_count[-1] + (_is_valid and not x.is_integer())
+        )
+
+        if i == len(self._filled_values):
+            self._filled_values = np.concatenate([self._filled_values, np.zeros(i)])
+
+        if not _is_valid:
+            self._last_null_index = i
+            return
+
+        self._last_valid_index = i
+        self._filled_values[i] = x
+
+        while self._at_or_below_values and self._at_or_below_values[-1] >= x:
+            self._at_or_below_indices.pop()
+            self._at_or_below_values.pop()
+        self._at_or_below_indices.append(i)
+        self._at_or_below_values.append(x)
+
+        while self._at_or_above_negated_values and self._at_or_above_negated_values[-1] >= -x:
+            self._at_or_above_indices.pop()
+            self._at_or_above_negated_values.pop()
+        self._at_or_above_indices.append(i)
+        self._at_or_above_negated_values.append(-x)
+
+    def long_run(self) -> tuple:
+        '''
+        Returns (mean_of_historical_training_values, current_long_run) for the most recent window,
+        both null if the window is not evaluated.
+        '''
+        _window_length = len(self._values)
+
+        # Expanding windows are only evaluated once they contain enough non-null values
+        if _window_length == 0 or self._cumulative_count[_window_length] < self.minimum_periods:
+            return np.nan, np.nan
+
+        i = _window_length - 1
+        x = self._values[i]
+        _breakpoint = max(int(_window_length / 2), self.minimum_periods)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            _mean = np.float64(self._cumulative_sum[_breakpoint]) / self._cumulative_count[_breakpoint]
+
+        if _breakpoint >= _window_length:
+            _run = 0
+        elif np.isnan(_mean):
+            # Every comparison with a null mean is false, so every testing period continues the run
+            _run = i - _breakpoint + 1
+        else:
+            if self._is_tie_sensitive(i, _breakpoint, _mean):
+                _mean = np.float64(self._filled_values[:_breakpoint].sum()) / self._cumulative_count[_breakpoint]
+            _run = self._long_run_for_mean(i, _breakpoint, _mean)
+
+        return _mean, _run
+
+    def _long_run_for_mean(self, i: int, breakpoint: int, mean: float) -> int:
+        x = self._values[i]
+
+        if np.isnan(x):
+            return self._null_long_run(i, breakpoint, mean)
+        elif x == mean:
+            return 0
+        elif x > mean:
+            _k = bisect_right(self._at_or_below_values, mean)
+            _last_break = self._at_or_below_indices[_k - 1] if _k > 0 else -1
+        else:
+            _k = bisect_right(self._at_or_above_negated_values, -mean)
+            _last_break = self._at_or_above_indices[_k - 1] if _k > 0 else -1
+
+        return i - max(_last_break + 1, self._last_null_index + 1, breakpoint)
+
+    def _is_tie_sensitive(self, i: int, breakpoint: int, mean: float) -> bool:
+        _tolerance = _training_mean_tolerance(
+            breakpoint,
+            self._cumulative_count[breakpoint],
+            self._cumulative_absolute_sum[breakpoint],
+            self._cumulative_non_integer_count[breakpoint],
+            mean,
+        )
+
+        if _tolerance == 0:
+            return False
+
+        x = self._values[i]
+
+        if np.isnan(x):
+            # Runs of nulls only depend on whether the last non-null value equals the mean
+            _last_valid_index = self._last_valid_index
+            return _last_valid_index >= breakpoint and abs(self._values[_last_valid_index] - mean) <= _tolerance
+        elif abs(x - mean) <= _tolerance:
+            return True
+        elif x > mean:
+            return (bisect_right(self._at_or_below_values, mean - _tolerance)
+                    != bisect_right(self._at_or_below_values, mean + _tolerance))
+        else:
+            return (bisect_right(self._at_or_above_negated_values, -mean - _tolerance)
+                    != bisect_right(self._at_or_above_negated_values, -mean + _tolerance))
+
+    def _null_long_run(self, i: int, breakpoint: int, mean: float) -> int:
+        # The most recent value is part of a run of nulls that started after the last non-null value
+        _last_valid_index = self._last_valid_index
+
+        if _last_valid_index < breakpoint:
+            return i - breakpoint + 1
+        elif self._values[_last_valid_index] == mean:
+            return i - _last_valid_index
+        else:
+            return i - _last_valid_index - 1
+
+
+def _change_in_steady_state_long_incremental(values: np.ndarray, minimum_periods: int, engine='numpy',
+                                             evaluate_last_n_periods: int = None) -> dict:
+    '''
+    Incremental equivalent of _change_in_steady_state_long_point_in_time, evaluated for every
+    expanding window in a single pass of ChangeInSteadyStateLongState. Total cost is O(n log n).
+    With evaluate_last_n_periods, every period is pushed but the long run is only found for the
+    last N windows.
+
+    With engine='numba', the compiled equivalent of the same loop is used instead.
+
+    Returns a dictionary of arrays with the same length as `values`:
+        change_in_steady_state_long_actionability_score, mean_of_historical_training_values,
+        current_long_run
+    '''
+    _values = np.asarray(values, dtype=float)
+    _n_periods = len(_values)
+    _start = _evaluation_start(_n_periods, evaluate_last_n_periods)
+
+    if engine == 'numba':
+        _kernel = legacy_metric_check_numba.get_compiled_kernel(
+            legacy_metric_check_numba.change_in_steady_state_long_kernel
+        )
+        _training_means = np.full(_n_periods + 1, np.nan)
+        _has_training_mean = np.zeros(_n_periods + 1, dtype=bool)
+        mean_of_historical_training_values, current_long_run, _is_tie_sensitive = _kernel(
+            _values, minimum_periods, _training_means, _has_training_mean
+        )
+
+        # Windows whose long run depends on how the training mean is rounded are rare. They are
+        # evaluated again with the training mean computed as pd.Series.mean computes it.
+        _tie_sensitive_positions = np.flatnonzero(_is_tie_sensitive[_start:]) + _start
+        if len(_tie_sensitive_positions) > 0:
+            _filled_values = np.where(np.isnan(_values), 0, _values)
+            _cumulative_count = np.concatenate([[0], np.cumsum(~np.isnan(_values))])
+
+            for _breakpoint in np.unique(np.maximum((_tie_sensitive_positions + 1) // 2, minimum_periods)):
+                _training_means[_breakpoint] = _filled_values[:_breakpoint].sum() / _cumulative_count[_breakpoint]
+                _has_training_mean[_breakpoint] = True
+
+            mean_of_historical_training_values, current_long_run, _ = _kernel(
+                _values, minimum_periods, _training_means, _has_training_mean
+            )
+
+        mean_of_historical_training_values[:_start] = np.nan
+        current_long_run[:_start] = np.nan
+        return _change_in_steady_state_long_from_long_runs(
+            _values, mean_of_historical_training_values, current_long_run
+        )
+
+    mean_of_historical_training_values = np.full(_n_periods, np.nan)
+    current_long_run = np.full(_n_periods, np.nan)
+
+    _state = ChangeInSteadyStateLongState(minimum_periods)
+    for i in range(_n_periods):
+        _state.push(_values[i])
+        if i >= _start:
+            mean_of_historical_training_values[i], current_long_run[i] = _state.long_run()
+
+    return _change_in_steady_state_long_from_long_runs(_values, mean_of_historical_training_values, current_long_run)
+
+
+def change_in_steady_state_long(s: pd.Series, minimum_periods=14, engine='numpy',
+                                evaluate_last_n_periods: int = None) -> pd.DataFrame:
+    '''
+    Assumptions: 14 periods or more, 50/50 split between historical series (baseline) and
+                 evaluation series (testing)
+
+    engine: 'numpy' (default) and 'numba' use the incremental calculation, 'python' applies
+            the reference point-in-time implementation to each window. See ENGINES.
+    evaluate_last_n_periods: if set, only the last N periods are evaluated and earlier
+            periods are null.
+    '''
+    _validate_engine(engine)
+
     _t = pd.DataFrame(s)
 
-    output_columns = [
-        'change_in_steady_state_long_actionability_score',
-        'mean_of_historical_training_values',
-        'current_long_run',
-    ]
+    output_columns = CHANGE_IN_STEADY_STATE_LONG_OUTPUT_COLUMNS
 
     _t['period_value'] = s
 
-    for colname in output_columns:
-        create_output_column_for_rolling_period(
+    if engine == 'python':
+        _outputs = create_output_frame_for_rolling_period(
             _change_in_steady_state_long_point_in_time,
-            _t,
-            colname,
+            _t['period_value'],
+            minimum_periods=minimum_periods,
+            rolling_calculation_periods=None,
+            evaluate_last_n_periods=evaluate_last_n_periods,
+        ).reindex(columns=output_columns)
+    else:
+        _outputs = _change_in_steady_state_long_incremental(
+            _t['period_value'].to_numpy(dtype=float),
             minimum_periods=minimum_periods,
-            rolling_calculation_periods=None
+            engine=engine,
+            evaluate_last_n_periods=evaluate_last_n_periods,
         )
 
+    for colname in output_columns:
+        _t[colname] = _outputs[colname]
+
     return _t
 
 
-def sudden_change(s: pd.Series, minimum_periods=7, rolling_calculation_periods=None) -> pd.DataFrame:
-    def _sudden_change_point_in_time(values: pd.Series, local_minimum_n_periods: int):
-        L1_SUDDEN_CHANGE_CONSTANT = 3.27
-        L2_SUDDEN_CHANGE_CONSTANT = 4.905
+def _sudden_change_point_in_time(values: np.ndarray, local_minimum_n_periods: int):
+    '''
+    Calculates the Sudden Change check, including thresholds, for a point in time.
+
+    This is the reference implementation; sudden_change uses the equivalent vectorized
+    calculation in _sudden_change_from_window_statistics.
+    '''
+    values_series = np.asarray(values, dtype=float)
 
-        values_series = values
+    if len(values) >= local_minimum_n_periods:
+        mean_of_historical_values = _pandas_mean(values_series)
+        mean_of_pop_differences = _pandas_mean_of_pop_differences(values_series)
+        most_recent_period_change = values_series[-1] - values_series[-2]
 
-        if len(values) >= local_minimum_n_periods:
-            mean_of_historical_values = values_series.mean()
-            mean_of_pop_differences = abs(values_series - values_series.shift(1)).mean()
-            most_recent_period_change = values_series[-1] - values_series[-2]
+        is_actionable = np.abs(most_recent_period_change) >= L1_SUDDEN_CHANGE_CONSTANT * mean_of_pop_differences
 
-            is_actionable = np.abs(most_recent_period_change) >= L1_SUDDEN_CHANGE_CONSTANT * mean_of_pop_differences
+        sudden_change_l1_threshold_value = L1_SUDDEN_CHANGE_CONSTANT * mean_of_pop_differences
+        sudden_change_l2_threshold_value = L2_SUDDEN_CHANGE_CONSTANT * mean_of_pop_differences
 
-            sudden_change_l1_threshold_value = L1_SUDDEN_CHANGE_CONSTANT * mean_of_pop_differences
-            sudden_change_l2_threshold_value = L2_SUDDEN_CHANGE_CONSTANT * mean_of_pop_differences
+        sudden_change_actionability_score = 0 if not is_actionable else (
+                (abs(most_recent_period_change) - sudden_change_l1_threshold_value)
+                / (sudden_change_l2_threshold_value - sudden_change_l1_threshold_value)
+                * np.sign(most_recent_period_change)
+        )
 
-            sudden_change_actionability_score = 0 if not is_actionable else (
-                    (abs(most_recent_period_change) - sudden_change_l1_threshold_value)
-                    / (sudden_change_l2_threshold_value - sudden_change_l1_threshold_value)
-                    * np.sign(most_recent_period_change)
-            )
+        return {
+            # Actionability
+            'sudden_change_actionability_score': sudden_change_actionability_score,
 
-            return {
-                # Actionability
-                'sudden_change_actionability_score': sudden_change_actionability_score,
+            # Thresholds
+            'sudden_change_l1_threshold_value':  sudden_change_l1_threshold_value,
+            'sudden_change_l2_threshold_value':  sudden_change_l2_threshold_value,
 
-                # Thresholds
-                'sudden_change_l1_threshold_value':  sudden_change_l1_threshold_value,
-                'sudden_change_l2_threshold_value':  sudden_change_l2_threshold_value,
+            # Intermediate Values
+            'most_recent_period_change':         most_recent_period_change,
+        }
 
-                # Intermediate Values
-                'most_recent_period_change':         most_recent_period_change,
-            }
+    else:
+        return {
+            'sudden_change_actionability_score': None,
+            'sudden_change_l1_threshold_value':  None,
+            'sudden_change_l2_threshold_value':  None,
+            'most_recent_period_change':         None,
+        }
 
-        else:
-            return {
-                'sudden_change_actionability_score': None,
-                'sudden_change_l1_threshold_value':  None,
-                'sudden_change_l2_threshold_value':  None,
-                'most_recent_period_change':         None,
-            }
+
+def _sudden_change_from_window_statistics(window_statistics: dict) -> dict:
+    '''
+    Vectorized equivalent of _sudden_change_point_in_time, applied to the output of
+    calculate_window_statistics. Windows that are not evaluated are null in every output column.
+    '''
+    mean_of_pop_differences = window_statistics['mean_of_pop_differences']
+    most_recent_period_change = window_statistics['most_recent_value'] - window_statistics['previous_value']
+
+    sudden_change_l1_threshold_value = L1_SUDDEN_CHANGE_CONSTANT * mean_of_pop_differences
+    sudden_change_l2_threshold_value = L2_SUDDEN_CHANGE_CONSTANT * mean_of_pop_differences
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        is_actionable = np.abs(most_recent_period_change) >= L1_SUDDEN_CHANGE_CONSTANT * mean_of_pop_differences
+
+        sudden_change_actionability_score = np.where(
+            is_actionable,
+            (np.abs(most_recent_period_change) - sudden_change_l1_threshold_value)
+            / (sudden_change_l2_threshold_value - sudden_change_l1_threshold_value)
+            * np.sign(most_recent_period_change),
+            0,
+        )
+
+    _output = {
+        # Actionability
+        'sudden_change_actionability_score': sudden_change_actionability_score,
+
+        # Thresholds
+        'sudden_change_l1_threshold_value':  sudden_change_l1_threshold_value,
+        'sudden_change_l2_threshold_value':  sudden_change_l2_threshold_value,
+
+        # Intermediate Values
+        'most_recent_period_change':         most_recent_period_change,
+    }
+
+    return {
+        key: np.where(window_statistics['is_evaluated'], value, np.nan) for key, value in _output.items()
+    }
+
+
+def sudden_change(s: pd.Series, minimum_periods=7, rolling_calculation_periods=None,
+                  engine='numpy', evaluate_last_n_periods: int = None) -> pd.DataFrame:
+    '''
+    engine: 'numpy' (default) and 'numba' calculate every window in a single pass, 'python' applies
+            the reference point-in-time implementation to each window. See ENGINES.
+    evaluate_last_n_periods: if set, only the last N periods are evaluated and earlier
+            periods are null.
+    '''
+    _validate_engine(engine)
 
     _t = pd.DataFrame(s)
 
-    output_columns = [
-        'sudden_change_actionability_score',
-        'sudden_change_l1_threshold_value',
-        'sudden_change_l2_threshold_value',
-        'most_recent_period_change',
-    ]
+    output_columns = SUDDEN_CHANGE_OUTPUT_COLUMNS
 
     _t['period_value'] = s
 
-    for colname in output_columns:
-        create_output_column_for_rolling_period(
+    if engine == 'python':
+        _outputs = create_output_frame_for_rolling_period(
             _sudden_change_point_in_time,
-            _t,
-            colname,
+            _t['period_value'],
             minimum_periods=minimum_periods,
-            rolling_calculation_periods=rolling_calculation_periods
+            rolling_calculation_periods=rolling_calculation_periods,
+            evaluate_last_n_periods=evaluate_last_n_periods,
+        ).reindex(columns=output_columns)
+    else:
+        _outputs = _sudden_change_from_window_statistics(
+            calculate_window_statistics(
+                _t['period_value'].to_numpy(dtype=float),
+                minimum_periods=minimum_periods,
+                rolling_calculation_periods=rolling_calculation_periods,
+                engine=engine,
+                evaluate_last_n_periods=evaluate_last_n_periods,
+            )
         )
 
+    for colname in output_columns:
+        _t[colname] = _outputs[colname]
+
     return _t
 
 
-def outside_of_normal_range(s: pd.Series, minimum_periods=8, rolling_calculation_periods=None) -> pd.DataFrame:
-    def _outside_of_normal_range_point_in_time(values: pd.Series, local_minimum_n_periods: int):
-        '''
-        Calculates Outside of Normal Range check, including thresholds, for a point in time.
-        This function is applied to a rolling time series
-        '''
-        # Statistical process control constants
-        L1_NORMAL_RANGE_CONSTANT = 2.66
-        L2_NORMAL_RANGE_CONSTANT = 3.99
-
-        values_series = values
-
-        if len(values) >= local_minimum_n_periods:
-            mean_of_historical_values = values_series.mean()
-            mean_of_pop_differences = abs(values_series - values_series.shift(1)).mean()
-            most_recent_value = values_series[-1]
-            most_recent_value_deviation = most_recent_value - mean_of_historical_values
-            is_actionable = np.abs(most_recent_value_deviation) >= L1_NORMAL_RANGE_CONSTANT * mean_of_pop_differences
-
-            low_l2_threshold_value = mean_of_historical_values - L2_NORMAL_RANGE_CONSTANT * mean_of_pop_differences
-            low_l1_threshold_value = mean_of_historical_values - L1_NORMAL_RANGE_CONSTANT * mean_of_pop_differences
-            high_l1_threshold_value = mean_of_historical_values + L1_NORMAL_RANGE_CONSTANT * mean_of_pop_differences
-            high_l2_threshold_value = mean_of_historical_values + L2_NORMAL_RANGE_CONSTANT * mean_of_pop_differences
-
-            normal_range_actionability_score = 0 if not is_actionable else (
-                    (abs(most_recent_value_deviation) - mean_of_pop_differences * L1_NORMAL_RANGE_CONSTANT)
-                    / (
-                            mean_of_pop_differences * L2_NORMAL_RANGE_CONSTANT - mean_of_pop_differences * L1_NORMAL_RANGE_CONSTANT)
-                    * np.sign(most_recent_value_deviation)
-            )
+def _outside_of_normal_range_point_in_time(values: np.ndarray, local_minimum_n_periods: int):
+    '''
+    Calculates Outside of Normal Range check, including thresholds, for a point in time.
+    This function is applied to a rolling time series.
 
-            return {
-                # Actionability
-                'normal_range_actionability_score': normal_range_actionability_score,
-
-                # Thresholds
-                'low_l2_threshold_value':           low_l2_threshold_value,
-                'low_l1_threshold_value':           low_l1_threshold_value,
-                'high_l1_threshold_value':          high_l1_threshold_value,
-                'high_l2_threshold_value':          high_l2_threshold_value,
-
-                # Intermediate Calculations
-                'normal_range_rolling_baseline':    mean_of_historical_values,
-                'normal_range_rolling_deviation':   mean_of_pop_differences,
-            }
+    This is the reference implementation; outside_of_normal_range uses the equivalent vectorized
+    calculation in _outside_of_normal_range_from_window_statistics.
+    '''
+    values_series = np.asarray(values, dtype=float)
 
-        else:
-            return {
-                'normal_range_actionability_score': None,
-                'low_l2_threshold_value':           None,
-                'low_l1_threshold_value':           None,
-                'high_l1_threshold_value':          None,
-                'high_l2_threshold_value':          None,
-                'mean_of_historical_values':        None,
-                'mean_of_pop_differences':          None,
-            }
+    if len(values) >= local_minimum_n_periods:
+        mean_of_historical_values = _pandas_mean(values_series)
+        mean_of_pop_differences = _pandas_mean_of_pop_differences(values_series)
+        most_recent_value = values_series[-1]
+        most_recent_value_deviation = most_recent_value - mean_of_historical_values
+        is_actionable = np.abs(most_recent_value_deviation) >= L1_NORMAL_RANGE_CONSTANT * mean_of_pop_differences
+
+        low_l2_threshold_value = mean_of_historical_values - L2_NORMAL_RANGE_CONSTANT * mean_of_pop_differences
+        low_l1_threshold_value = mean_of_historical_values - L1_NORMAL_RANGE_CONSTANT * mean_of_pop_differences
+        high_l1_threshold_value = mean_of_historical_values + L1_NORMAL_RANGE_CONSTANT * mean_of_pop_differences
+        high_l2_threshold_value = mean_of_historical_values + L2_NORMAL_RANGE_CONSTANT * mean_of_pop_differences
+
+        normal_range_actionability_score = 0 if not is_actionable else (
+                (abs(most_recent_value_deviation) - mean_of_pop_differences * L1_NORMAL_RANGE_CONSTANT)
+                / (
+                        mean_of_pop_differences * L2_NORMAL_RANGE_CONSTANT - mean_of_pop_differences * L1_NORMAL_RANGE_CONSTANT)
+                * np.sign(most_recent_value_deviation)
+        )
+
+        return {
+            # Actionability
+            'normal_range_actionability_score': normal_range_actionability_score,
+
+            # Thresholds
+            'low_l2_threshold_value':           low_l2_threshold_value,
+            'low_l1_threshold_value':           low_l1_threshold_value,
+            'high_l1_threshold_value':          high_l1_threshold_value,
+            'high_l2_threshold_value':          high_l2_threshold_value,
+
+            # Intermediate Calculations
+            'normal_range_rolling_baseline':    mean_of_historical_values,
+            'normal_range_rolling_deviation':   mean_of_pop_differences,
+        }
+
+    else:
+        return {
+            'normal_range_actionability_score': None,
+            'low_l2_threshold_value':           None,
+            'low_l1_threshold_value':           None,
+            'high_l1_threshold_value':          None,
+            'high_l2_threshold_value':          None,
+            'normal_range_rolling_baseline':    None,
+            'normal_range_rolling_deviation':   None,
+        }
+
+
+def _outside_of_normal_range_from_window_statistics(window_statistics: dict) -> dict:
+    '''
+    Vectorized equivalent of _outside_of_normal_range_point_in_time, applied to the output of
+    calculate_window_statistics. Windows that are not evaluated are null in every output column.
+    '''
+    mean_of_historical_values = window_statistics['mean_of_historical_values']
+    mean_of_pop_differences = window_statistics['mean_of_pop_differences']
+    most_recent_value_deviation = window_statistics['most_recent_value'] - mean_of_historical_values
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        is_actionable = np.abs(most_recent_value_deviation) >= L1_NORMAL_RANGE_CONSTANT * mean_of_pop_differences
+
+        normal_range_actionability_score = np.where(
+            is_actionable,
+            (np.abs(most_recent_value_deviation) - mean_of_pop_differences * L1_NORMAL_RANGE_CONSTANT)
+            / (mean_of_pop_differences * L2_NORMAL_RANGE_CONSTANT - mean_of_pop_differences * L1_NORMAL_RANGE_CONSTANT)
+            * np.sign(most_recent_value_deviation),
+            0,
+        )
+
+    _output = {
+        # Actionability
+        'normal_range_actionability_score': normal_range_actionability_score,
+
+        # Thresholds
+        'low_l2_threshold_value':           mean_of_historical_values - L2_NORMAL_RANGE_CONSTANT * mean_of_pop_differences,
+        'low_l1_threshold_value':           mean_of_historical_values - L1_NORMAL_RANGE_CONSTANT * mean_of_pop_differences,
+        'high_l1_threshold_value':          mean_of_historical_values + L1_NORMAL_RANGE_CONSTANT * mean_of_pop_differences,
+        'high_l2_threshold_value':          mean_of_historical_values + L2_NORMAL_RANGE_CONSTANT * mean_of_pop_differences,
+
+        # Intermediate Calculations
+        'normal_range_rolling_baseline':    mean_of_historical_values,
+        'normal_range_rolling_deviation':   mean_of_pop_differences,
+    }
+
+    return {
+        key: np.where(window_statistics['is_evaluated'], value, np.nan) for key, value in _output.items()
+    }
+
+
+def outside_of_normal_range(s: pd.Series, minimum_periods=8, rolling_calculation_periods=None,
+                            engine='numpy', evaluate_last_n_periods: int = None) -> pd.DataFrame:
+    '''
+    engine: 'numpy' (default) and 'numba' calculate every window in a single pass, 'python' applies
+            the reference point-in-time implementation to each window. See ENGINES.
+    evaluate_last_n_periods: if set, only the last N periods are evaluated and earlier
+            periods are null.
+    '''
+    _validate_engine(engine)
 
     _t = pd.DataFrame(s)
 
-    output_columns = [
-        'normal_range_actionability_score',
-        'low_l2_threshold_value',
-        'low_l1_threshold_value',
-        'normal_range_rolling_baseline',
-        'high_l1_threshold_value',
-        'high_l2_threshold_value',
-    ]
+    output_columns = OUTSIDE_OF_NORMAL_RANGE_OUTPUT_COLUMNS
 
     _t['period_value'] = s
 
-    for colname in output_columns:
-        # TODO: This is very inefficient. For this to scale, especially scanning
-        #       many time series, shouldn't re-do each ts calculation five times
-        #       unnecessarily!
-        create_output_column_for_rolling_period(
+    if engine == 'python':
+        _outputs = create_output_frame_for_rolling_period(
             _outside_of_normal_range_point_in_time,
-            _t,
-            colname,
+            _t['period_value'],
             minimum_periods=minimum_periods,
-            rolling_calculation_periods=rolling_calculation_periods
+            rolling_calculation_periods=rolling_calculation_periods,
+            evaluate_last_n_periods=evaluate_last_n_periods,
+        ).reindex(columns=output_columns)
+    else:
+        _outputs = _outside_of_normal_range_from_window_statistics(
+            calculate_window_statistics(
+                _t['period_value'].to_numpy(dtype=float),
+                minimum_periods=minimum_periods,
+                rolling_calculation_periods=rolling_calculation_periods,
+                engine=engine,
+                evaluate_last_n_periods=evaluate_last_n_periods,
+            )
+        )
+
+    for colname in output_columns:
+        _t[colname] = _outputs[colname]
+
+    return _t
+
+
+def _evaluate_most_recent_period(outputs: dict, output_columns: List[str]) -> dict:
+    return {colname: float(outputs[colname]) for colname in output_columns}
+
+
+def outside_of_normal_range_for_most_recent_period(state: WindowStatisticsState) -> dict:
+    '''
+    Evaluates outside_of_normal_range for the most recent period pushed to state, without
+    recomputing the history. Returns a dictionary of the output columns.
+    '''
+    return _evaluate_most_recent_period(
+        _outside_of_normal_range_from_window_statistics(state.statistics()),
+        OUTSIDE_OF_NORMAL_RANGE_OUTPUT_COLUMNS,
+    )
+
+
+def sudden_change_for_most_recent_period(state: WindowStatisticsState) -> dict:
+    '''
+    Evaluates sudden_change for the most recent period pushed to state, without recomputing
+    the history. Returns a dictionary of the output columns.
+    '''
+    return _evaluate_most_recent_period(
+        _sudden_change_from_window_statistics(state.statistics()),
+        SUDDEN_CHANGE_OUTPUT_COLUMNS,
+    )
+
+
+def change_in_steady_state_long_for_most_recent_period(state: ChangeInSteadyStateLongState) -> dict:
+    '''
+    Evaluates change_in_steady_state_long for the most recent period pushed to state, without
+    recomputing the history. Returns a dictionary of the output columns.
+    '''
+    return _evaluate_most_recent_period(
+        _change_in_steady_state_long_from_long_runs(np.float64(state.most_recent_value), *state.long_run()),
+        CHANGE_IN_STEADY_STATE_LONG_OUTPUT_COLUMNS,
+    )
+
+
+def _evaluate_batch_check(check: Callable, vectorized_func: Callable, output_columns: List[str], df: pd.DataFrame,
+                          minimum_periods: int, rolling_calculation_periods: Any, engine: str,
+                          evaluate_last_n_periods: int = None) -> pd.DataFrame:
+    _validate_engine(engine)
+
+    if engine == 'python':
+        return pd.concat(
+            {
+                colname: check(
+                    df[colname],
+                    minimum_periods=minimum_periods,
+                    rolling_calculation_periods=rolling_calculation_periods,
+                    engine=engine,
+                    evaluate_last_n_periods=evaluate_last_n_periods,
+                )[['period_value'] + output_columns]
+                for colname in df.columns
+            },
+            axis=1,
+            names=['metric', 'output'],
         )
 
-    return _t
\ No newline at end of file
+    return create_batch_output_frame(
+        df,
+        vectorized_func(
+            calculate_window_statistics(
+                df.to_numpy(dtype=float),
+                minimum_periods=minimum_periods,
+                rolling_calculation_periods=rolling_calculation_periods,
+                engine=engine,
+                evaluate_last_n_periods=evaluate_last_n_periods,
+            )
+        ),
+        output_columns,
+    )
+
+
+def outside_of_normal_range_batch(df: pd.DataFrame, minimum_periods=8, rolling_calculation_periods=None,
+                                  engine='numpy', evaluate_last_n_periods: int = None) -> pd.DataFrame:
+    '''
+    Evaluates outside_of_normal_range for every column of a wide frame (one column per metric,
+    sharing the index) at once, as 2-D array operations along the time axis.
+
+    Returns a frame with (metric, output column) MultiIndex columns, where each metric has the
+    period_value and output columns of outside_of_normal_range.
+    '''
+    return _evaluate_batch_check(
+        outside_of_normal_range,
+        _outside_of_normal_range_from_window_statistics,
+        OUTSIDE_OF_NORMAL_RANGE_OUTPUT_COLUMNS,
+        df,
+        minimum_periods=minimum_periods,
+        rolling_calculation_periods=rolling_calculation_periods,
+        engine=engine,
+        evaluate_last_n_periods=evaluate_last_n_periods,
+    )
+
+
+def sudden_change_batch(df: pd.DataFrame, minimum_periods=7, rolling_calculation_periods=None,
+                        engine='numpy', evaluate_last_n_periods: int = None) -> pd.DataFrame:
+    '''
+    Evaluates sudden_change for every column of a wide frame (one column per metric, sharing
+    the index) at once, as 2-D array operations along the time axis.
+
+    Returns a frame with (metric, output column) MultiIndex columns, where each metric has the
+    period_value and output columns of sudden_change.
+    '''
+    return _evaluate_batch_check(
+        sudden_change,
+        _sudden_change_from_window_statistics,
+        SUDDEN_CHANGE_OUTPUT_COLUMNS,
+        df,
+        minimum_periods=minimum_periods,
+        rolling_calculation_periods=rolling_calculation_periods,
+        engine=engine,
+        evaluate_last_n_periods=evaluate_last_n_periods,
+    )
@@ -0,0 +1,235 @@
+"""
+Loop implementations of the legacy metric check calculations for engine='numba'.
+
+The functions in this module are written in the subset of Python that numba can compile,
+and are only compiled (once per process) when the numba engine is requested. numba is an
+optional dependency; install it with `pip install numba`.
+"""
+import numpy as np
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+_compiled_kernels = {}
+
+
+def get_compiled_kernel(kernel):
+    """
+    Returns the numba-compiled version of a kernel defined in this module, compiling it on first use.
+    """
+    if numba is None:
+        raise ImportError("The numba engine requires numba to be installed. Install it with `pip install numba`, "
+                          "or use engine='numpy'.")
+
+    if kernel not in _compiled_kernels:
+        _compiled_kernels[kernel] = numba.njit(kernel)
+
+    return _compiled_kernels[kernel]
+
+
+def window_statistics_kernel(values, minimum_periods, rolling_calculation_periods):
+    """
+    Loop equivalent of legacy_metric_check.calculate_window_statistics for a single series.
+    Expanding windows keep running sums; rolling windows (rolling_calculation_periods > 0)
+    also subtract the value and the difference that leave the window at each step.
+
+    Returns a tuple of arrays: (is_evaluated, mean_of_historical_values, mean_of_pop_differences,
+    previous_value)
+    """
+    _n_periods = len(values)
+    _is_rolling = rolling_calculation_periods > 0
+    _window_length = min(_n_periods, rolling_calculation_periods)
+
+    is_evaluated = np.zeros(_n_periods, dtype=np.bool_)
+    mean_of_historical_values = np.full(_n_periods, np.nan)
+    mean_of_pop_differences = np.full(_n_periods, np.nan)
+    previous_value = np.full(_n_periods, np.nan)
+
+    _count = 0
+    _sum = 0.0
+    _pop_difference_count = 0
+    _pop_difference_sum = 0.0
+
+    for i in range(_n_periods):
+        _value = values[i]
+        if not np.isnan(_value):
+            _count += 1
+            _sum += _value
+
+        if i > 0:
+            _pop_difference = abs(_value - values[i - 1])
+            if not np.isnan(_pop_difference):
+                _pop_difference_count += 1
+                _pop_difference_sum += _pop_difference
+
+        if _is_rolling and i >= _window_length:
+            # The value leaving the window, and the difference that paired it with its successor
+            _outgoing_value = values[i - _window_length]
+            if not np.isnan(_outgoing_value):
+                _count -= 1
+                _sum -= _outgoing_value
+
+            _outgoing_pop_difference = abs(values[i - _window_length + 1] - _outgoing_value)
+            if not np.isnan(_outgoing_pop_difference):
+                _pop_difference_count -= 1
+                _pop_difference_sum -= _outgoing_pop_difference
+
+        if _is_rolling:
+            is_evaluated[i] = (
+                i >= _window_length - 1 and _count >= _window_length and _window_length >= minimum_periods
+            )
+            _current_window_length = min(i + 1, _window_length)
+        else:
+            is_evaluated[i] = _count >= minimum_periods
+            _current_window_length = i + 1
+
+        if _count > 0:
+            mean_of_historical_values[i] = _sum / _count
+        if _pop_difference_count > 0:
+            mean_of_pop_differences[i] = _pop_difference_sum / _pop_difference_count
+        if _current_window_length >= 2:
+            previous_value[i] = values[i - 1]
+
+    return is_evaluated, mean_of_historical_values, mean_of_pop_differences, previous_value
+
+
+def change_in_steady_state_long_kernel(values, minimum_periods, training_means, has_training_mean):
+    """
+    Loop equivalent of legacy_metric_check.ChangeInSteadyStateLongState, using fixed-size arrays
+    as the monotonic stacks. numba sums do not round like pd.Series.mean, so windows whose long run
+    could depend on that rounding are flagged in is_tie_sensitive. Where has_training_mean[b] is set,
+    training_means[b] is used as the mean of the first b values instead of the running sums.
+
+    Returns a tuple of arrays: (mean_of_historical_training_values, current_long_run, is_tie_sensitive)
+    """
+    _n_periods = len(values)
+
+    mean_of_historical_training_values = np.full(_n_periods, np.nan)
+    current_long_run = np.full(_n_periods, np.nan)
+    is_tie_sensitive = np.zeros(_n_periods, dtype=np.bool_)
+    _eps = 2.0 ** -52
+
+    _cumulative_count = np.zeros(_n_periods + 1, dtype=np.int64)
+    _cumulative_sum = np.zeros(_n_periods + 1)
+    _cumulative_absolute_sum = np.zeros(_n_periods + 1)
+    _cumulative_non_integer_count = np.zeros(_n_periods + 1, dtype=np.int64)
+    for i in range(_n_periods):
+        _is_valid = not np.isnan(values[i])
+        _cumulative_count[i + 1] = _cumulative_count[i] + _is_valid
+        _cumulative_sum[i + 1] = _cumulative_sum[i] + (values[i] if _is_valid else 0.0)
+        _cumulative_absolute_sum[i + 1] = _cumulative_absolute_sum[i] + (abs(values[i]) if _is_valid else 0.0)
+        _cumulative_non_integer_count[i + 1] = (
+            _cumulative_non_integer_count[i] + (_is_valid and values[i] != np.floor(values[i]))
+        )
+
+    _at_or_below_indices = np.empty(_n_periods, dtype=np.int64)
+    _at_or_below_values = np.empty(_n_periods)
+    _n_at_or_below = 0
+    _at_or_above_indices = np.empty(_n_periods, dtype=np.int64)
+    _at_or_above_negated_values = np.empty(_n_periods)
+    _n_at_or_above = 0
+    _last_null_index = -1
+    _last_valid_index = -1
+
+    for i in range(_n_periods):
+        x = values[i]
+
+        if np.isnan(x):
+            _last_null_index = i
+        else:
+            _last_valid_index = i
+
+            while _n_at_or_below > 0 and _at_or_below_values[_n_at_or_below - 1] >= x:
+                _n_at_or_below -= 1
+            _at_or_below_indices[_n_at_or_below] = i
+            _at_or_below_values[_n_at_or_below] = x
+            _n_at_or_below += 1
+
+            while _n_at_or_above > 0 and _at_or_above_negated_values[_n_at_or_above - 1] >= -x:
+                _n_at_or_above -= 1
+            _at_or_above_indices[_n_at_or_above] = i
+            _at_or_above_negated_values[_n_at_or_above] = -x
+            _n_at_or_above += 1
+
+        if _cumulative_count[i + 1] < minimum_periods:
+            continue
+
+        _breakpoint = max((i + 1) // 2, minimum_periods)
+        _mean = np.nan
+        if _cumulative_count[_breakpoint] > 0:
+            _mean = _cumulative_sum[_breakpoint] / _cumulative_count[_breakpoint]
+
+        # See legacy_metric_check._training_mean_tolerance
+        _tolerance = 0.0
+        if has_training_mean[_breakpoint]:
+            _mean = training_means[_breakpoint]
+        elif _cumulative_non_integer_count[_breakpoint] > 0 or _cumulative_absolute_sum[_breakpoint] >= 2.0 ** 53:
+            _tolerance = (
+                2 * _breakpoint * _eps * _cumulative_absolute_sum[_breakpoint] / _cumulative_count[_breakpoint]
+                + 2 * _eps * abs(_mean)
+            )
+
+        if _breakpoint >= i + 1:
+            _run = 0
+        elif np.isnan(_mean):
+            _run = i - _breakpoint + 1
+        elif np.isnan(x):
+            # See ChangeInSteadyStateLongState._null_long_run
+            if _last_valid_index < _breakpoint:
+                _run = i - _breakpoint + 1
+            elif values[_last_valid_index] == _mean:
+                _run = i - _last_valid_index
+            else:
+                _run = i - _last_valid_index - 1
+            is_tie_sensitive[i] = (
+                _tolerance > 0 and _last_valid_index >= _breakpoint
+                and abs(values[_last_valid_index] - _mean) <= _tolerance
+            )
+        elif x == _mean:
+            _run = 0
+            is_tie_sensitive[i] = _tolerance > 0
+        else:
+            if x > _mean:
+                _stack_indices, _stack_values, _stack_size, _threshold = (
+                    _at_or_below_indices, _at_or_below_values, _n_at_or_below, _mean
+                )
+            else:
+                _stack_indices, _stack_values, _stack_size, _threshold = (
+                    _at_or_above_indices, _at_or_above_negated_values, _n_at_or_above, -_mean
+                )
+
+            _k = _bisect_right(_stack_values, _stack_size, _threshold)
+            _last_break = _stack_indices[_k - 1] if _k > 0 else -1
+            _run = i - max(_last_break + 1, _last_null_index + 1, _breakpoint)
+            is_tie_sensitive[i] = _tolerance > 0 and (
+                abs(x - _mean) <= _tolerance
+                or _bisect_right(_stack_values, _stack_size, _threshold - _tolerance)
+                != _bisect_right(_stack_values, _stack_size, _threshold + _tolerance)
+            )
+
+        mean_of_historical_training_values[i] = _mean
+        current_long_run[i] = _run
+
+    return mean_of_historical_training_values, current_long_run, is_tie_sensitive
+
+
+def _bisect_right(stack_values, stack_size, threshold):
+    """
+    bisect.bisect_right over the first stack_size entries of stack_values.
+    """
+    _low, _high = 0, stack_size
+    while _low < _high:
+        _middle = (_low + _high) // 2
+        if threshold < stack_values[_middle]:
+            _high = _middle
+        else:
+            _low = _middle + 1
+
+    return _low
+
+
+if numba is not None:
+    # Called from kernels, so compiled (lazily, on first use) with them
+    _bisect_right = numba.njit(_bisect_right)
@@ -1,13 +1,93 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, InitVar
+from functools import lru_cache
+from typing import Dict, List
 
 import numpy as np
 import pandas as pd
 from plotly import express as px, graph_objects as go
 
-from mode_notebook_assets.practical_dashboard_displays.legacy_helper_functions import map_actionability_score_to_color, \
-    dot, sparkline, map_actionability_score_to_description, map_threshold_labels_to_name_by_configuration
+from mode_notebook_assets.practical_dashboard_displays.helper_functions import combine_actionability_score_arrays, \
+    largest_triangle_three_buckets
+from mode_notebook_assets.practical_dashboard_displays.legacy_helper_functions import get_actionability_color_mapper, \
+    dot, sparkline, map_actionability_scores_to_descriptions, map_threshold_labels_to_name_by_configuration, \
+    get_scatter_trace_type
 from mode_notebook_assets.practical_dashboard_displays.legacy_metric_check import outside_of_normal_range, \
-    sudden_change, change_in_steady_state_long
+    sudden_change, change_in_steady_state_long, outside_of_normal_range_batch, sudden_change_batch, \
+    WindowStatisticsState, ChangeInSteadyStateLongState, outside_of_normal_range_for_most_recent_period, \
+    sudden_change_for_most_recent_period, change_in_steady_state_long_for_most_recent_period
+from mode_notebook_assets.practical_dashboard_displays.metric_evaluation_pipeline.pipeline_cache import \
+    results_cache, make_results_cache_key, get_disk_results_cache
+
+
+@lru_cache(maxsize=None)
+def compose_actionability_summary_template(description: str, normal_range_state: str = None,
+                                           sudden_change_direction: int = None, long_run_direction: int = None,
+                                           format_html_text=True) -> str:
+    """
+    Composes the actionability summary written by MetricEvaluationPipeline.write_actionability_summary for
+    one combination of categories. Results are cached, so each distinct summary is only composed once.
+
+    Parameters
+    ----------
+    description: The description of the general actionability score, see map_actionability_score_to_description
+    normal_range_state: 'normal', 'high' or 'low', or None if the outside of normal range check is disabled
+    sudden_change_direction: 1, 0 or -1, or None if the sudden change check is disabled
+    long_run_direction: 1, 0 or -1, or None if the change in steady state long check is disabled
+    format_html_text: if true, apply HTML formatting and punctuation, else format for plain text display
+
+    Returns
+    -------
+    The summary text. If there is a long run, the number of periods is left as a {current_long_run} field.
+    """
+    _bold_start_tag = '<b>' if format_html_text else ''
+    _bold_end_tag = '</b>' if format_html_text else ''
+    _line_break_tag = '<br>' if format_html_text else ' - '
+    _sentence_end_punctuation = '.' if format_html_text else ''
+
+    def _bold_string(s):
+        return _bold_start_tag + s + _bold_end_tag
+
+    _description = _bold_string(description)
+
+    if normal_range_state is not None:
+        _high_or_low = _bold_string(normal_range_state) + " compared with historical ranges"
+        _within_normal_str = f"within a {_bold_string('normal')} range based on historical values"
+        _normal_range_summary = (
+            f'Metric is {_within_normal_str if normal_range_state == "normal" else _high_or_low}'
+            f'{_sentence_end_punctuation}'
+        )
+    else:
+        _normal_range_summary = None
+
+    if sudden_change_direction:
+        _sudden_dip_or_spike_summary = (
+            f'Metric {_bold_start_tag}{"increased" if sudden_change_direction == 1 else "decreased"} '
+            f'suddenly{_bold_end_tag} compared to historical values{_sentence_end_punctuation}'
+        )
+    else:
+        _sudden_dip_or_spike_summary = None
+
+    if long_run_direction:
+        _change_in_steady_state_long_summary = (
+            f'Metric has been {_bold_string("above" if long_run_direction == 1 else "below")}'
+            f'the historical average for {{current_long_run}} '
+            f'consecutive periods{_sentence_end_punctuation}'
+        )
+    else:
+        _change_in_steady_state_long_summary = None
+
+    return _line_break_tag.join([s for s in [_description, _normal_range_summary, _sudden_dip_or_spike_summary,
+                                             _change_in_steady_state_long_summary] if s])
+
+
+# Results columns that every pipeline keeps, because the pipeline methods rely on them. The score column of
+# each enabled check and current_long_run are kept as well, see MetricEvaluationPipeline._actionability_summary_columns
+REQUIRED_RESULTS_COLUMNS = ['period_value', 'general_actionability_score', 'is_valence_ambiguous']
+
+# Check outputs that explain how an actionability score was reached, but are not used by the displays
+INTERMEDIATE_RESULTS_COLUMNS = ['most_recent_period_change', 'mean_of_historical_training_values']
+
+RESULTS_FLOAT_DTYPES = ['float64', 'float32']
 
 
 @dataclass
@@ -30,6 +110,26 @@ class MetricEvaluationPipeline:
 
     disable_warnings: bool = False
 
+    # Calculation engine for the metric checks: 'numpy', 'numba' or 'python' (reference implementation)
+    engine: str = 'numpy'
+
+    # Only evaluate the checks for the last N periods, e.g. 1 for status tables that only show the current
+    # record. Earlier periods keep their values but have null check outputs. None evaluates every period.
+    # Periods added with append are always evaluated.
+    evaluate_last_n_periods: int = None
+
+    # Results schema: the columns to keep (None keeps every column; REQUIRED_RESULTS_COLUMNS and the enabled checks'
+    # scores are always kept), whether to keep INTERMEDIATE_RESULTS_COLUMNS, and the dtype of float columns
+    # (see RESULTS_FLOAT_DTYPES)
+    results_columns: list = None
+    keep_intermediates: bool = True
+    results_float_dtype: str = 'float64'
+
+    # Reuse the results of an earlier pipeline with the same series and check configuration, see pipeline_cache.
+    # With a cache_dir, results are also kept on disk and reused across processes and sessions.
+    use_results_cache: bool = True
+    cache_dir: str = None
+
     is_higher_good: bool = True
     is_lower_good: bool = False
     good_palette: list = None
@@ -37,7 +137,11 @@ class MetricEvaluationPipeline:
     ambiguous_palette: list = None
     annotations_color=px.colors.sequential.Blues[3],
 
-    def __post_init__(self):
+    # Check outputs computed ahead of time (see from_frame), in the order
+    # [outside_of_normal_range, sudden_change, change_in_steady_state_long]
+    precomputed_check_results: InitVar[List[pd.DataFrame]] = None
+
+    def __post_init__(self, precomputed_check_results: List[pd.DataFrame] = None):
 
         if self.check_change_in_steady_state_long and not self.disable_warnings:
             raise Warning(
@@ -47,22 +151,16 @@ class MetricEvaluationPipeline:
                 'average. If you wish to proceed, set the disable_warnings argument to True'
             )
 
-        _outside_of_normal_range_results = outside_of_normal_range(
-            self.s,
-            minimum_periods=self.outside_of_normal_range_minimum_periods,
-            rolling_calculation_periods=self.outside_of_normal_range_rolling_calculation_periods
-        ) if self.check_outside_of_normal_range else None
+        # Running check state and periods added by append, see append
+        self._check_states = None
+        self._appended_periods = []
+        self._appended_values = []
+        self._appended_records = []
+        self._current_record = None
+        self._n_appended_periods = 0
 
-        _sudden_change_results = sudden_change(
-            self.s,
-            minimum_periods=self.sudden_change_minimum_periods,
-            rolling_calculation_periods=self.sudden_change_rolling_calculation_periods
-        ) if self.check_sudden_change else None
-
-        _change_in_steady_state_long_results = change_in_steady_state_long(
-            self.s,
-            minimum_periods=self.change_in_steady_state_long_minimum_periods
-        ) if self.check_change_in_steady_state_long else None
+        assert self.results_float_dtype in RESULTS_FLOAT_DTYPES, \
+            f'results_float_dtype must be one of {RESULTS_FLOAT_DTYPES}, got {self.results_float_dtype!r}'
 
         self._actionability_score_columns = [
             s for s in [
@@ -72,6 +170,87 @@ class MetricEvaluationPipeline:
             ] if s is not None
         ]
 
+        # Precomputed check results are already shared across pipelines (see from_frame), so they skip the caches
+        _results_cache_key = (
+            make_results_cache_key(self.s, self._get_results_configuration())
+            if self.use_results_cache and precomputed_check_results is None else None
+        )
+        _disk_results_cache = (
+            get_disk_results_cache(self.cache_dir) if _results_cache_key is not None and self.cache_dir else None
+        )
+
+        _results = results_cache.get(_results_cache_key) if _results_cache_key is not None else None
+
+        if _results is None and _disk_results_cache is not None:
+            _results = _disk_results_cache.get(_results_cache_key)
+            if _results is not None:
+                results_cache.put(_results_cache_key, _results)
+
+        if _results is None:
+            _results = self.conform_results_schema(
+                self.combine_metric_check_results(precomputed_check_results or self.run_metric_checks())
+            )
+
+            if _results_cache_key is not None:
+                results_cache.put(_results_cache_key, _results)
+            if _disk_results_cache is not None:
+                _disk_results_cache.put(_results_cache_key, _results)
+
+        self.results = _results
+
+    def _get_results_configuration(self) -> tuple:
+        """
+        Returns the options that affect results, as the configuration part of the results cache key.
+        """
+        return (
+            self.check_outside_of_normal_range,
+            self.outside_of_normal_range_minimum_periods,
+            self.outside_of_normal_range_rolling_calculation_periods,
+            self.check_sudden_change,
+            self.sudden_change_minimum_periods,
+            self.sudden_change_rolling_calculation_periods,
+            self.check_change_in_steady_state_long,
+            self.change_in_steady_state_long_minimum_periods,
+            self.engine,
+            self.evaluate_last_n_periods,
+            None if self.results_columns is None else tuple(self.results_columns),
+            self.keep_intermediates,
+            self.results_float_dtype,
+        )
+
+    @property
+    def results(self) -> pd.DataFrame:
+        if self._appended_records:
+            self.s = self._extend_series(self.s, self._appended_periods, self._appended_values)
+            self._results = pd.concat([
+                self._results,
+                self.conform_results_schema(pd.DataFrame(
+                    self._appended_records,
+                    index=self.s.index[-len(self._appended_records):],
+                    columns=self._results.columns,
+                )),
+            ])
+
+            self._appended_periods, self._appended_values, self._appended_records = [], [], []
+
+        return self._results
+
+    @results.setter
+    def results(self, results: pd.DataFrame):
+        self._results = results
+        self._current_record = None
+
+    def combine_metric_check_results(self, check_results: List[pd.DataFrame]) -> pd.DataFrame:
+        """
+        Combines the outputs of run_metric_checks into a single frame, adding the general actionability
+        score and valence ambiguity of each period.
+        """
+        (
+            _outside_of_normal_range_results,
+            _sudden_change_results,
+            _change_in_steady_state_long_results
+        ) = check_results
+
         if len(self._actionability_score_columns) > 0:
             _results = pd.concat(
                 [df for df in
@@ -82,31 +261,275 @@ class MetricEvaluationPipeline:
 
             _results = _results.loc[:, ~_results.columns.duplicated()]
 
-            self.results = pd.concat([
-                _results,
-                pd.DataFrame.from_records(
-                    [self.combine_actionability_scores(r) for r in
-                     _results[self._actionability_score_columns].to_dict(orient='records')],
-                    index=_results.index,
-                )
-            ], axis=1,)
+            # Periods that were not evaluated (including those outside the evaluation horizon) have null
+            # scores, so their general actionability score is null and their valence is not ambiguous
+            return _results.assign(**combine_actionability_score_arrays(
+                _results[self._actionability_score_columns].to_numpy(dtype=float)
+            ))
         else:
             _results = pd.DataFrame(self.s)
             _results['period_value'] = self.s
-            self.results = _results.assign(general_actionability_score=0, is_valence_ambiguous=False)
+            return _results.assign(general_actionability_score=0, is_valence_ambiguous=False)
+
+    def conform_results_schema(self, results: pd.DataFrame) -> pd.DataFrame:
+        """
+        Selects the results columns configured by results_columns and keep_intermediates, and gives every
+        column a fixed dtype: is_valence_ambiguous is bool, and check outputs, scores and values are floats
+        of results_float_dtype, with nulls as NaN. Integer values keep their dtype.
+
+        Parameters
+        ----------
+        results: A frame of combined metric check results, see combine_metric_check_results
+
+        Returns
+        -------
+        The conformed results frame.
+        """
+        _columns = list(results.columns)
+        _value_columns = [results.columns[0], 'period_value']
+
+        if self.results_columns is not None:
+            _unknown_columns = [c for c in self.results_columns if c not in _columns]
+            assert not _unknown_columns, f'results_columns {_unknown_columns} are not results columns of this pipeline'
+            _required_columns = REQUIRED_RESULTS_COLUMNS + self._actionability_summary_columns()
+            _columns = [c for c in _columns if c in self.results_columns or c in _required_columns]
+
+        if not self.keep_intermediates:
+            _columns = [c for c in _columns if c not in INTERMEDIATE_RESULTS_COLUMNS]
+
+        _dtypes = {
+            colname: bool if colname == 'is_valence_ambiguous' else self.results_float_dtype
+            for colname, dtype in results[_columns].dtypes.items()
+            if not (colname in _value_columns and pd.api.types.is_integer_dtype(dtype))
+        }
+
+        return results[_columns].astype(_dtypes)
+
+    def append(self, period, value: float) -> None:
+        """
+        Adds a period to the end of the series and evaluates it without recomputing the history.
+        Each enabled check keeps a running state (counts, sums and sums of absolute differences of the
+        window, and the current long run), so a new period costs O(1) (O(log n) for the change in steady
+        state long check), and results are the same as a full recompute over the extended series.
+
+        The running state is built from the history on the first call. Appended periods are added to
+        self.s and self.results the next time results is read.
+
+        Parameters
+        ----------
+        period: Index label of the new period, after the last period of self.s
+        value: Value of the metric for the new period
+        """
+        if self._check_states is None:
+            self._check_states = self._build_check_states(self.s)
+
+        self._n_appended_periods += 1
+
+        # While the series is shorter than a rolling calculation window, every window covers the whole
+        # series and moves with each new period, so earlier periods change and are recomputed instead.
+        if any(
+            state.n_periods < state.rolling_calculation_periods for state in self._check_states.values()
+            if isinstance(state, WindowStatisticsState) and state.rolling_calculation_periods is not None
+        ):
+            # Periods are only held back once the series is at least as long as every rolling window
+            self.s = self._extend_series(self.s, [period], [value])
+            self.results = self.conform_results_schema(self.combine_metric_check_results(self.run_metric_checks()))
+            self._check_states = None
+            return
+
+        for state in self._check_states.values():
+            state.push(value)
+
+        _record = {self._results.columns[0]: value, 'period_value': value}
+
+        if self.check_outside_of_normal_range:
+            _record.update(outside_of_normal_range_for_most_recent_period(
+                self._check_states['outside_of_normal_range']
+            ))
+        if self.check_sudden_change:
+            _record.update(sudden_change_for_most_recent_period(self._check_states['sudden_change']))
+        if self.check_change_in_steady_state_long:
+            _record.update(change_in_steady_state_long_for_most_recent_period(
+                self._check_states['change_in_steady_state_long']
+            ))
+
+        if len(self._actionability_score_columns) > 0:
+            _record.update(self.combine_actionability_scores(
+                {colname: _record[colname] for colname in self._actionability_score_columns}
+            ))
+        else:
+            _record.update(general_actionability_score=0, is_valence_ambiguous=False)
+
+        self._appended_periods.append(period)
+        self._appended_values.append(value)
+        self._appended_records.append(_record)
+        self._current_record = None
+
+    def extend(self, s: pd.Series) -> None:
+        """
+        Appends every period of s, in order. See append.
+        """
+        for period, value in s.items():
+            self.append(period, value)
+
+    @staticmethod
+    def _extend_series(s: pd.Series, periods: list, values: list) -> pd.Series:
+        return pd.concat([s, pd.Series(values, index=pd.Index(periods, name=s.index.name), name=s.name)])
+
+    def _build_check_states(self, s: pd.Series) -> Dict[str, object]:
+        _check_states = {}
+
+        if self.check_outside_of_normal_range:
+            _check_states['outside_of_normal_range'] = WindowStatisticsState(
+                minimum_periods=self.outside_of_normal_range_minimum_periods,
+                rolling_calculation_periods=self.outside_of_normal_range_rolling_calculation_periods,
+            )
+        if self.check_sudden_change:
+            _check_states['sudden_change'] = WindowStatisticsState(
+                minimum_periods=self.sudden_change_minimum_periods,
+                rolling_calculation_periods=self.sudden_change_rolling_calculation_periods,
+            )
+        if self.check_change_in_steady_state_long:
+            _check_states['change_in_steady_state_long'] = ChangeInSteadyStateLongState(
+                minimum_periods=self.change_in_steady_state_long_minimum_periods,
+            )
+
+        for value in s.to_numpy(dtype=float):
+            for state in _check_states.values():
+                state.push(value)
+
+        return _check_states
+
+    def run_metric_checks(self) -> List[pd.DataFrame]:
+        """
+        Runs each enabled metric check on self.s. Disabled checks are None.
+
+        With evaluate_last_n_periods, periods added with append are evaluated as well, so the horizon
+        is widened by the number of appended periods.
+
+        Returns
+        -------
+        [outside_of_normal_range results, sudden_change results, change_in_steady_state_long results]
+        """
+        _evaluate_last_n_periods = (
+            None if self.evaluate_last_n_periods is None else self.evaluate_last_n_periods + self._n_appended_periods
+        )
+
+        _outside_of_normal_range_results = outside_of_normal_range(
+            self.s,
+            minimum_periods=self.outside_of_normal_range_minimum_periods,
+            rolling_calculation_periods=self.outside_of_normal_range_rolling_calculation_periods,
+            engine=self.engine,
+            evaluate_last_n_periods=_evaluate_last_n_periods,
+        ) if self.check_outside_of_normal_range else None
+
+        _sudden_change_results = sudden_change(
+            self.s,
+            minimum_periods=self.sudden_change_minimum_periods,
+            rolling_calculation_periods=self.sudden_change_rolling_calculation_periods,
+            engine=self.engine,
+            evaluate_last_n_periods=_evaluate_last_n_periods,
+        ) if self.check_sudden_change else None
+
+        _change_in_steady_state_long_results = change_in_steady_state_long(
+            self.s,
+            minimum_periods=self.change_in_steady_state_long_minimum_periods,
+            engine=self.engine,
+            evaluate_last_n_periods=_evaluate_last_n_periods,
+        ) if self.check_change_in_steady_state_long else None
+
+        return [_outside_of_normal_range_results, _sudden_change_results, _change_in_steady_state_long_results]
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, **kwargs) -> Dict[str, 'MetricEvaluationPipeline']:
+        """
+        Builds a MetricEvaluationPipeline for every column of a wide frame (one column per metric,
+        sharing the index). The outside of normal range and sudden change checks are evaluated for
+        all columns at once as 2-D array operations, instead of once per pipeline.
+
+        Parameters
+        ----------
+        df: A DataFrame with one numeric column per metric
+        kwargs: MetricEvaluationPipeline options, applied to every column. metric_name defaults to the column name.
+
+        Returns
+        -------
+        A dictionary of MetricEvaluationPipelines keyed by column name.
+        """
+        def _option(name):
+            return kwargs.get(name, cls.__dataclass_fields__[name].default)
+
+        _engine = _option('engine')
+        _evaluate_last_n_periods = _option('evaluate_last_n_periods')
+
+        _outside_of_normal_range_results = outside_of_normal_range_batch(
+            df,
+            minimum_periods=_option('outside_of_normal_range_minimum_periods'),
+            rolling_calculation_periods=_option('outside_of_normal_range_rolling_calculation_periods'),
+            engine=_engine,
+            evaluate_last_n_periods=_evaluate_last_n_periods,
+        ) if _option('check_outside_of_normal_range') else None
+
+        _sudden_change_results = sudden_change_batch(
+            df,
+            minimum_periods=_option('sudden_change_minimum_periods'),
+            rolling_calculation_periods=_option('sudden_change_rolling_calculation_periods'),
+            engine=_engine,
+            evaluate_last_n_periods=_evaluate_last_n_periods,
+        ) if _option('check_sudden_change') else None
+
+        def _check_results_for_column(colname):
+            _s = df[colname]
+            return [
+                pd.concat([_s.to_frame(), batch_results[colname]], axis=1) if batch_results is not None else None
+                for batch_results in [_outside_of_normal_range_results, _sudden_change_results]
+            ] + [
+                change_in_steady_state_long(
+                    _s,
+                    minimum_periods=_option('change_in_steady_state_long_minimum_periods'),
+                    engine=_engine,
+                    evaluate_last_n_periods=_evaluate_last_n_periods,
+                ) if _option('check_change_in_steady_state_long') else None
+            ]
+
+        return {
+            colname: cls(
+                df[colname],
+                **dict({'metric_name': colname}, **kwargs),
+                precomputed_check_results=_check_results_for_column(colname),
+            ) for colname in df.columns
+        }
 
     @staticmethod
     def combine_actionability_scores(record: dict):
+        """
+        Combines the actionability scores of a single record. See combine_actionability_score_arrays.
+        """
+        _combined = combine_actionability_score_arrays(np.array([list(record.values())], dtype=float))
+
         return {
             # Take the actionability score farthest from zero
-            'general_actionability_score': max(record.values(), key=np.abs),
+            'general_actionability_score': _combined['general_actionability_score'][0],
 
             # Valence is considered ambiguous if at least two actionability scores have different signs
-            'is_valence_ambiguous':        len(set(np.sign(x) for x in record.values() if pd.notna(x) and x != 0)) > 1,
+            'is_valence_ambiguous':        bool(_combined['is_valence_ambiguous'][0]),
         }
 
-    def get_current_record(self):
-        return self.results.to_dict(orient='records')[-1]
+    def get_current_record(self) -> dict:
+        """
+        Returns the last row of results as a dictionary. The record is computed once and cached until
+        results change (e.g. after an append), and only the last row is read to build it.
+        """
+        if self._current_record is None:
+            if self._appended_records:
+                # Read the most recent appended period without adding the pending periods to results
+                self._current_record = {
+                    colname: self._appended_records[-1][colname] for colname in self._results.columns
+                }
+            else:
+                self._current_record = self._results.iloc[[-1]].to_dict(orient='records')[0]
+
+        return dict(self._current_record)
 
     def get_current_actionability_status(self):
         return self.get_current_record()['general_actionability_score']
@@ -114,41 +537,51 @@ class MetricEvaluationPipeline:
     def is_current_actionability_ambiguous(self):
         return self.get_current_record()['is_valence_ambiguous']
 
-    def get_current_actionability_status_dot(self):
-        _color = map_actionability_score_to_color(
-            x=self.get_current_actionability_status(),
-            is_valence_ambiguous=self.is_current_actionability_ambiguous(),
-            is_higher_good=self.is_higher_good,
-            is_lower_good=self.is_lower_good,
+    def get_actionability_color_mapper(self):
+        """
+        Returns the ActionabilityColorMapper for this pipeline's palettes and valence configuration.
+        """
+        return get_actionability_color_mapper(
             good_palette=self.good_palette,
             bad_palette=self.bad_palette,
-            ambiguous_palette=self.ambiguous_palette
+            ambiguous_palette=self.ambiguous_palette,
+            is_higher_good=self.is_higher_good,
+            is_lower_good=self.is_lower_good,
         )
 
-        _hex_color = '#%02x%02x%02x' % tuple(
-            int(s) for s in _color.replace('rgb(', '').replace(')', '').split(',')
-        )
+    def get_current_actionability_status_dot(self, backend='matplotlib'):
+        _hex_color = self.get_actionability_color_mapper().map_scores(
+            [self.get_current_actionability_status()],
+            is_valence_ambiguous=self.is_current_actionability_ambiguous(),
+            hex_colors=True,
+        )[0]
 
         _mouse_over_text = self.write_actionability_summary(self.get_current_record(), format_html_text=False)
 
-        return dot(_hex_color, title_text=_mouse_over_text)
+        return dot(_hex_color, title_text=_mouse_over_text, backend=backend)
 
-    def get_current_sparkline(self, periods=20, sparkline_width=2, sparkline_height=.25):
-        return sparkline(self.results.tail(periods)['period_value'], figsize=(sparkline_width, sparkline_height))
+    def get_current_sparkline(self, periods=20, sparkline_width=2, sparkline_height=.25, backend='matplotlib'):
+        return sparkline(
+            self.results.tail(periods)['period_value'],
+            figsize=(sparkline_width, sparkline_height),
+            backend=backend,
+        )
 
-    def get_current_display_record(self, sparkline=True, sparkline_periods=20, sparkline_width=2, sparkline_height=.25):
+    def get_current_display_record(self, sparkline=True, sparkline_periods=20, sparkline_width=2, sparkline_height=.25,
+                                   sparkline_backend='matplotlib', status_dot_backend='matplotlib'):
 
         _output = {'Metric': self.metric_name} if self.metric_name else {}
 
         _output['Current Value'] = self.get_current_record()['period_value']
         _output['Actionability Score'] = self.get_current_actionability_status()
-        _output['Status Dot'] = self.get_current_actionability_status_dot()
+        _output['Status Dot'] = self.get_current_actionability_status_dot(backend=status_dot_backend)
 
         if sparkline:
             _output['Sparkline'] = self.get_current_sparkline(
                 periods=sparkline_periods,
                 sparkline_width=sparkline_width,
                 sparkline_height=sparkline_height,
+                backend=sparkline_backend,
             )
 
         return _output
@@ -172,60 +605,91 @@ class MetricEvaluationPipeline:
         -------
         Textual summary of enabled metric checks for the given period value.
         """
-        _bold_start_tag = '<b>' if format_html_text else ''
-        _bold_end_tag = '</b>' if format_html_text else ''
-        _line_break_tag = '<br>' if format_html_text else ' - '
-        _sentence_end_punctuation = '.' if format_html_text else ''
+        return self._write_actionability_summaries(
+            {colname: [record[colname]] for colname in self._actionability_summary_columns()},
+            is_higher_good=is_higher_good,
+            is_lower_good=is_lower_good,
+            format_html_text=format_html_text,
+        )[0]
+
+    def write_actionability_summaries(self, results: pd.DataFrame, is_higher_good=True, is_lower_good=False,
+                                      format_html_text=True) -> List[str]:
+        """
+        Batch equivalent of write_actionability_summary for every row of a results frame. Rows are mapped
+        to categories with array operations, and each distinct summary sentence is formatted once
+        (see compose_actionability_summary_template) and reused for every row in the same categories.
+
+        Parameters
+        ----------
+        results: Rows from self.results
+        is_higher_good: boolean valence metadata for metric interpretation
+        is_lower_good: boolean valence metadata for metric interpretation
+        format_html_text: if true, apply HTML formatting and punctuation, else format for plain text display
+
+        Returns
+        -------
+        A list with the textual summary of each row.
+        """
+        return self._write_actionability_summaries(
+            {colname: results[colname].to_numpy() for colname in self._actionability_summary_columns()},
+            is_higher_good=is_higher_good,
+            is_lower_good=is_lower_good,
+            format_html_text=format_html_text,
+        )
+
+    def _actionability_summary_columns(self) -> List[str]:
+        return ['general_actionability_score', 'is_valence_ambiguous'] + self._actionability_score_columns + (
+            ['current_long_run'] if self.check_change_in_steady_state_long else []
+        )
+
+    def _write_actionability_summaries(self, columns: Dict[str, np.ndarray], is_higher_good: bool,
+                                       is_lower_good: bool, format_html_text: bool) -> List[str]:
+        _n_records = len(columns['general_actionability_score'])
+        _disabled = [None] * _n_records
 
-        def _bold_string(s):
-            return _bold_start_tag + s + _bold_end_tag
+        def _directions(colname):
+            with np.errstate(invalid='ignore'):
+                _sign = np.sign(np.asarray(columns[colname], dtype=float))
+            return np.select([_sign == 0, _sign == 1], [0, 1], default=-1).tolist()
 
-        _description = _bold_start_tag + map_actionability_score_to_description(
-            record['general_actionability_score'],
-            is_valence_ambiguous=record['is_valence_ambiguous'],
+        _descriptions = map_actionability_scores_to_descriptions(
+            columns['general_actionability_score'],
+            is_valence_ambiguous=columns['is_valence_ambiguous'],
             is_higher_good=is_higher_good,
-            is_lower_good=is_lower_good
-        ) + _bold_end_tag
+            is_lower_good=is_lower_good,
+        ).tolist()
 
         if self.check_outside_of_normal_range:
-            _normal_range_sign = np.sign(record["normal_range_actionability_score"])
-            _high_or_low = (
-                    (_bold_string("high") if record["normal_range_actionability_score"] > 0 else _bold_string("low")) + \
-                    " compared with historical ranges"
-            )
-            _within_normal_str = f"within a {_bold_string('normal')} range based on historical values"
-            _is_in_normal_range = record["normal_range_actionability_score"] == 0
-            _normal_range_summary = (
-                f'Metric is {_within_normal_str if _is_in_normal_range else (_high_or_low)}{_sentence_end_punctuation}'
-            )
+            with np.errstate(invalid='ignore'):
+                _normal_range_score = np.asarray(columns['normal_range_actionability_score'], dtype=float)
+                _normal_range_states = np.select(
+                    [_normal_range_score == 0, _normal_range_score > 0], ['normal', 'high'], default='low',
+                ).tolist()
         else:
-            _normal_range_summary = None
+            _normal_range_states = _disabled
 
-        if self.check_sudden_change:
-            _sudden_change_sign = np.sign(record["sudden_change_actionability_score"])
-            _sudden_dip_or_spike_summary = (
-                None if _sudden_change_sign == 0
-                else f'Metric {_bold_start_tag}{"increased" if _sudden_change_sign == 1 else "decreased"} '
-                     f'suddenly{_bold_end_tag} compared to historical values{_sentence_end_punctuation}'
-            )
-        else:
-            _sudden_dip_or_spike_summary = None
+        _sudden_change_directions = (
+            _directions('sudden_change_actionability_score') if self.check_sudden_change else _disabled
+        )
 
         if self.check_change_in_steady_state_long:
-            _change_in_steady_state_long_sign = np.sign(record["change_in_steady_state_long_actionability_score"])
-            _change_in_steady_state_long_summary = (
-                None if _change_in_steady_state_long_sign == 0
-                else f'Metric has been {_bold_string("above" if _change_in_steady_state_long_sign == 1 else "below")}'
-                     f'the historical average for {int(record["current_long_run"])} '
-                     f'consecutive periods{_sentence_end_punctuation}'
-            )
+            _long_run_directions = _directions('change_in_steady_state_long_actionability_score')
+            _current_long_runs = columns['current_long_run']
         else:
-            _change_in_steady_state_long_summary = None
-
-        _text = _line_break_tag.join([s for s in [_description, _normal_range_summary, _sudden_dip_or_spike_summary,
-                                                  _change_in_steady_state_long_summary] if s])
+            _long_run_directions, _current_long_runs = _disabled, _disabled
+
+        _summaries = []
+        for description, normal_range_state, sudden_change_direction, long_run_direction, current_long_run in zip(
+                _descriptions, _normal_range_states, _sudden_change_directions, _long_run_directions,
+                _current_long_runs):
+            _template = compose_actionability_summary_template(
+                description, normal_range_state, sudden_change_direction, long_run_direction, format_html_text,
+            )
+            _summaries.append(
+                _template.format(current_long_run=int(current_long_run)) if long_run_direction else _template
+            )
 
-        return _text
+        return _summaries
 
     def display_actionability_time_series(self, title=None, metric_name=None,
                                           reference_series: pd.Series = None,
@@ -234,8 +698,21 @@ class MetricEvaluationPipeline:
                                           display_last_n_valence_periods=1,
                                           show_legend=False, show_normal_range_thresholds=True,
                                           high_detail_range_thresholds=True,
-                                          enforce_non_negative_yaxis=True, return_html=True,):
+                                          enforce_non_negative_yaxis=True, return_html=True,
+                                          include_plotlyjs=True, max_points: int = None, render_mode='svg'):
+        """
+        Plots the metric with its normal range thresholds, actionable periods and annotations.
 
+        max_points limits the number of points sent for each line (the value, reference and threshold
+        lines), which keeps charts of long series small and responsive. Lines are downsampled together,
+        keeping the periods that best preserve the shape of the value line (see
+        largest_triangle_three_buckets), and always keeping actionable, annotated and the most recent
+        periods. Actionable and annotated periods are always plotted in full. None plots every period.
+
+        render_mode='webgl' draws every trace with WebGL, with the same hover text and colors, which keeps
+        charts of tens of thousands of points responsive. 'auto' only does so above WEBGL_POINT_THRESHOLD
+        plotted periods, see get_scatter_trace_type.
+        """
         if reference_series is not None:
             _reference_series = reference_series.copy()
             _reference_series.name = 'reference_series'
@@ -243,6 +720,28 @@ class MetricEvaluationPipeline:
         else:
             df = self.results.dropna()
 
+        if max_points is not None and len(df.index) > max_points:
+            # Downsampling uses the distance between periods, or their order for non-numeric indexes
+            if isinstance(df.index, pd.DatetimeIndex):
+                _x = df.index.asi8
+            elif pd.api.types.is_numeric_dtype(df.index):
+                _x = df.index.to_numpy()
+            else:
+                _x = np.arange(len(df.index))
+
+            _line_df = df.iloc[largest_triangle_three_buckets(
+                _x,
+                df['period_value'],
+                max_points,
+                keep=(df['general_actionability_score'] != 0).values | df.index.isin(
+                    annotations.keys() if annotations is not None else []
+                ),
+            )]
+        else:
+            _line_df = df
+
+        _scatter = get_scatter_trace_type(render_mode, n_points=len(_line_df.index))
+
         fig = go.Figure(
             layout=go.Layout(
                 title=title,
@@ -267,11 +766,12 @@ class MetricEvaluationPipeline:
                     'low_l1_threshold_value',
                 ]
 
-            for colname in threshold_value_list:
+            # Thresholds left out of results_columns are not plotted
+            for colname in [c for c in threshold_value_list if c in df.columns]:
                 fig.add_trace(
-                    go.Scatter(
-                        x=df.index,
-                        y=df[colname],
+                    _scatter(
+                        x=_line_df.index,
+                        y=_line_df[colname],
                         mode='lines',
                         name=map_threshold_labels_to_name_by_configuration(
                             colname,
@@ -294,32 +794,23 @@ class MetricEvaluationPipeline:
         actionable_periods_df = df.loc[(df['general_actionability_score'] != 0).values & (~df.index.isin(_annotated_indices))]
 
         fig.add_trace(
-            go.Scatter(
+            _scatter(
                 x=actionable_periods_df.index,
                 y=actionable_periods_df.period_value,
                 mode='markers',
                 name='Actionability',
-                hovertext=[
-                    self.write_actionability_summary(
-                        record,
-                        is_higher_good=self.is_higher_good,
-                        is_lower_good=self.is_lower_good,
-                    ) for record in actionable_periods_df.to_records()],
+                hovertext=self.write_actionability_summaries(
+                    actionable_periods_df,
+                    is_higher_good=self.is_higher_good,
+                    is_lower_good=self.is_lower_good,
+                ),
                 hoverinfo="x+text",
                 marker=dict(
                     size=10,
-                    color=[
-                        map_actionability_score_to_color(
-                            score,
-                            is_valence_ambiguous=is_valence_ambiguous,
-                            is_higher_good=self.is_higher_good,
-                            is_lower_good=self.is_lower_good,
-                            good_palette=self.good_palette,
-                            bad_palette=self.bad_palette,
-                            ambiguous_palette=self.ambiguous_palette,
-                        ) for period, score, is_valence_ambiguous in
-                        actionable_periods_df[['general_actionability_score', 'is_valence_ambiguous']].to_records()
-                    ]
+                    color=self.get_actionability_color_mapper().map_scores(
+                        actionable_periods_df['general_actionability_score'],
+                        is_valence_ambiguous=actionable_periods_df['is_valence_ambiguous'],
+                    ),
                 ),
                 showlegend=show_legend,
             )
@@ -331,7 +822,7 @@ class MetricEvaluationPipeline:
             annotated_periods_df = df.loc[df.index.isin(_annotated_indices)]
 
             fig.add_trace(
-                go.Scatter(
+                _scatter(
                     x=annotated_periods_df.index,
                     y=annotated_periods_df.period_value,
                     mode='markers',
@@ -360,7 +851,7 @@ class MetricEvaluationPipeline:
                 ]
             )
             fig.add_trace(
-                go.Scatter(
+                _scatter(
                     x=historical_actionable_periods_df.index,
                     y=historical_actionable_periods_df.period_value,
                     mode='markers',
@@ -377,9 +868,9 @@ class MetricEvaluationPipeline:
         if reference_series is not None:
             # plot reference series
             fig.add_trace(
-                go.Scatter(
-                    x=df.index,
-                    y=df.reference_series,
+                _scatter(
+                    x=_line_df.index,
+                    y=_line_df.reference_series,
                     mode='lines',
                     name=reference_series_name or 'Reference Value',
                     line=dict(color='lightgrey', width=4),
@@ -389,9 +880,9 @@ class MetricEvaluationPipeline:
 
         # plot period values
         fig.add_trace(
-            go.Scatter(
-                x=df.index,
-                y=df.period_value,
+            _scatter(
+                x=_line_df.index,
+                y=_line_df.period_value,
                 mode='lines',
                 name=metric_name or 'Period Value',
                 line=dict(color='gray', width=4),
@@ -403,6 +894,7 @@ class MetricEvaluationPipeline:
             fig.update_yaxes(rangemode='nonnegative')
 
         if return_html:
-            return fig.to_html()
+            # include_plotlyjs is passed to plotly's to_html, e.g. 'cdn' to reference plotly.js instead of embedding it
+            return fig.to_html(include_plotlyjs=include_plotlyjs)
         else:
             return fig
\ No newline at end of file
@@ -0,0 +1,308 @@
+"""
+Caches of MetricEvaluationPipeline results.
+
+Pipelines built from the same series with the same check configuration have the same results, so
+dashboards that display a series more than once, or that are re-run in a notebook session, only
+evaluate it once. Entries are keyed by a fingerprint of the series (values, index and names) and
+the check configuration, and the least recently used entries are evicted once a cache is full. Keys
+also include the package version and CACHE_FORMAT_VERSION, so results computed by other versions of
+the checks, or stored in another format, are never reused.
+
+results_cache is shared by every pipeline in the process. Pipelines with a cache_dir also keep their
+results on disk (see DiskResultsCache), so they survive kernel restarts and scheduled runs.
+"""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import zipfile
+from collections import OrderedDict, namedtuple
+
+import numpy as np
+import pandas as pd
+
+from mode_notebook_assets import version
+
+# Bump when check results or the stored entry format change without a package version change
+CACHE_FORMAT_VERSION = 1
+
+CacheInfo = namedtuple('CacheInfo', ['hits', 'misses', 'maxsize', 'currsize'])
+
+
+def make_results_cache_key(s: pd.Series, configuration: tuple) -> str:
+    """
+    Returns a fingerprint of a series and a check configuration.
+
+    Parameters
+    ----------
+    s: The series evaluated by the pipeline
+    configuration: A tuple of the pipeline options that affect results. Must have a stable repr.
+
+    Returns
+    -------
+    A hex digest string.
+    """
+    _hash = hashlib.blake2b(digest_size=20)
+    _hash.update(repr((
+        version.__version__, CACHE_FORMAT_VERSION,
+        s.name, s.index.name, str(s.dtype), str(s.index.dtype), len(s), configuration,
+    )).encode())
+    _hash.update(pd.util.hash_pandas_object(s, index=True).to_numpy().tobytes())
+
+    return _hash.hexdigest()
+
+
+class MemoryResultsCache:
+    """
+    A thread-safe LRU cache of results frames, holding at most maxsize entries.
+
+    Frames are copied on the way in and out, so callers can modify the frames they pass or
+    receive without changing the cache.
+    """
+
+    def __init__(self, maxsize: int = 256):
+        assert maxsize >= 0, 'maxsize must be at least 0'
+
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        """
+        Returns a copy of the cached frame for key, or None if there is no entry.
+        """
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return self._entries[key].copy()
+
+    def put(self, key: str, results: pd.DataFrame) -> None:
+        """
+        Stores a copy of results for key, evicting the least recently used entries if the cache is full.
+        """
+        with self._lock:
+            self._entries[key] = results.copy()
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """
+        Removes every entry and resets the hit and miss counters.
+        """
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def cache_info(self) -> CacheInfo:
+        return CacheInfo(self.hits, self.misses, self.maxsize, len(self._entries))
+
+    def __len__(self):
+        return len(self._entries)
+
+
+# Shared by every pipeline in the process. Resize with results_cache.maxsize, or disable per pipeline
+# with MetricEvaluationPipeline(use_results_cache=False).
+results_cache = MemoryResultsCache()
+
+
+class DiskResultsCache:
+    """
+    A cache of results frames stored as files in cache_dir, holding at most max_bytes.
+
+    Each entry is an uncompressed .npz file with the results columns stored as one 2-D array per dtype
+    (like pandas blocks), the index, and JSON metadata for names, so loading it does not unpickle anything. Entries are written
+    atomically, so several processes can share a directory. Reading an entry updates its modification
+    time, and once the directory is larger than max_bytes the entries with the oldest modification
+    time are removed first.
+
+    Frames that cannot be stored without pickling (object columns, or indexes other than range,
+    datetime, numeric or string indexes) are not cached.
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int = 2 ** 30):
+        assert max_bytes >= 0, 'max_bytes must be at least 0'
+
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        # Total size of the entries, counted on the first write and kept up to date by this instance
+        self._total_bytes = None
+
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f'{key}.npz')
+
+    def get(self, key: str):
+        """
+        Returns the cached frame for key, or None if there is no readable entry.
+        """
+        _path = self._path(key)
+
+        try:
+            with np.load(_path, allow_pickle=False) as _arrays:
+                _results = self._decode(_arrays)
+            os.utime(_path)
+        except (OSError, EOFError, ValueError, KeyError, zipfile.BadZipFile):
+            with self._lock:
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.hits += 1
+
+        return _results
+
+    def put(self, key: str, results: pd.DataFrame) -> None:
+        """
+        Writes results for key, then removes the oldest entries while the cache is larger than max_bytes.
+        """
+        _arrays = self._encode(results)
+        if _arrays is None:
+            return
+
+        # A rewritten entry replaces the size of the entry it overwrites
+        try:
+            _replaced_bytes = os.path.getsize(self._path(key))
+        except OSError:
+            _replaced_bytes = 0
+
+        _file_descriptor, _temporary_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        with os.fdopen(_file_descriptor, 'wb') as f:
+            np.savez(f, **_arrays)
+        os.replace(_temporary_path, self._path(key))
+
+        with self._lock:
+            if self._total_bytes is None:
+                self._total_bytes = sum(size for _, size, _ in self._list_entries())
+            else:
+                self._total_bytes += os.path.getsize(self._path(key)) - _replaced_bytes
+
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+
+    def _list_entries(self) -> list:
+        _entries = []
+
+        for filename in os.listdir(self.cache_dir):
+            if filename.endswith('.npz'):
+                try:
+                    _stat = os.stat(os.path.join(self.cache_dir, filename))
+                except OSError:
+                    continue
+                _entries.append((filename, _stat.st_size, _stat.st_mtime))
+
+        return _entries
+
+    def _evict(self) -> None:
+        _entries = sorted(self._list_entries(), key=lambda entry: entry[2])
+        self._total_bytes = sum(size for _, size, _ in _entries)
+
+        for filename, size, _ in _entries:
+            if self._total_bytes <= self.max_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.cache_dir, filename))
+            except OSError:
+                pass
+            self._total_bytes -= size
+
+    @staticmethod
+    def _encode(results: pd.DataFrame):
+        _index = results.index
+        _index_metadata = {'name': _index.name}
+        _arrays = {}
+
+        if isinstance(_index, pd.RangeIndex):
+            _index_metadata.update(kind='range', start=_index.start, stop=_index.stop, step=_index.step)
+        elif isinstance(_index, pd.DatetimeIndex):
+            _index_metadata.update(kind='datetime', tz=None if _index.tz is None else str(_index.tz),
+                                   freq=_index.freqstr)
+            _arrays['index'] = (_index if _index.tz is None else _index.tz_convert('UTC').tz_localize(None)).to_numpy()
+        elif _index.dtype.kind in 'biuf' or (_index.dtype == object and all(isinstance(x, str) for x in _index)):
+            _index_metadata.update(kind='values', dtype=str(_index.dtype))
+            _arrays['index'] = _index.to_numpy(dtype=str if _index.dtype == object else _index.dtype)
+        else:
+            return None
+
+        # Column positions of each block, in block order
+        _blocks = {}
+        for i, dtype in enumerate(results.dtypes):
+            if dtype.kind not in 'biuf':
+                return None
+            _blocks.setdefault(str(dtype), []).append(i)
+
+        for j, positions in enumerate(_blocks.values()):
+            _arrays[f'block_{j}'] = results.iloc[:, positions].to_numpy()
+
+        _metadata = {'index': _index_metadata, 'columns': list(results.columns), 'blocks': list(_blocks.values())}
+
+        try:
+            _encoded_metadata = json.dumps(_metadata)
+        except TypeError:
+            return None
+
+        # Names that JSON would change, like tuples, are not cached
+        if json.loads(_encoded_metadata) != _metadata:
+            return None
+
+        _arrays['metadata'] = np.array(_encoded_metadata)
+
+        return _arrays
+
+    @staticmethod
+    def _decode(arrays) -> pd.DataFrame:
+        _metadata = json.loads(str(arrays['metadata']))
+        _index_metadata = _metadata['index']
+
+        if _index_metadata['kind'] == 'range':
+            _index = pd.RangeIndex(_index_metadata['start'], _index_metadata['stop'], _index_metadata['step'],
+                                   name=_index_metadata['name'])
+        elif _index_metadata['kind'] == 'datetime':
+            _index = pd.DatetimeIndex(arrays['index'], freq=_index_metadata['freq'], name=_index_metadata['name'])
+            if _index_metadata['tz'] is not None:
+                _index = _index.tz_localize('UTC').tz_convert(_index_metadata['tz'])
+        else:
+            _index = pd.Index(arrays['index'].astype(_index_metadata['dtype']), name=_index_metadata['name'])
+
+        _columns = {}
+        for j, positions in enumerate(_metadata['blocks']):
+            _block = arrays[f'block_{j}']
+            _columns.update({i: _block[:, k] for k, i in enumerate(positions)})
+
+        return pd.DataFrame(
+            {i: _columns[i] for i in range(len(_metadata['columns']))},
+            index=_index,
+        ).set_axis(_metadata['columns'], axis=1)
+
+    def cache_info(self) -> CacheInfo:
+        return CacheInfo(self.hits, self.misses, self.max_bytes, self._total_bytes)
+
+
+_disk_results_caches = {}
+
+
+def get_disk_results_cache(cache_dir: str) -> DiskResultsCache:
+    """
+    Returns the shared DiskResultsCache for a directory, creating it on first use. Set max_bytes on
+    the returned cache to change its size cap.
+    """
+    _key = os.path.abspath(cache_dir)
+
+    if _key not in _disk_results_caches:
+        _disk_results_caches[_key] = DiskResultsCache(cache_dir)
+
+    return _disk_results_caches[_key]
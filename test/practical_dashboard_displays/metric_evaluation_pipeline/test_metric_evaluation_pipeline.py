@@ -0,0 +1,234 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from mode_notebook_assets.practical_dashboard_displays.metric_evaluation_pipeline.metric_evaluation_pipeline import \
+    MetricEvaluationPipeline
+
+
+def make_test_frame(n_periods=60, n_metrics=4, seed=0) -> pd.DataFrame:
+    return pd.DataFrame(
+        np.random.default_rng(seed).normal(100, 15, (n_periods, n_metrics)).round(),
+        index=pd.date_range('2021-01-01', periods=n_periods),
+        columns=[f'metric_{i}' for i in range(n_metrics)],
+    )
+
+
+def test_from_frame_matches_single_series_pipelines():
+    _df = make_test_frame()
+    _options = {
+        'sudden_change_rolling_calculation_periods': 20,
+        'check_change_in_steady_state_long': True,
+        'disable_warnings': True,
+    }
+
+    _pipelines = MetricEvaluationPipeline.from_frame(_df, **_options)
+
+    assert list(_pipelines.keys()) == list(_df.columns)
+
+    for colname, pipeline in _pipelines.items():
+        assert pipeline.metric_name == colname
+        pd.testing.assert_frame_equal(
+            pipeline.results,
+            MetricEvaluationPipeline(_df[colname], **_options).results,
+        )
+
+
+@pytest.mark.parametrize('options', [
+    {},
+    {'outside_of_normal_range_rolling_calculation_periods': 20, 'sudden_change_rolling_calculation_periods': 12},
+    {'check_change_in_steady_state_long': True, 'disable_warnings': True},
+    {'check_outside_of_normal_range': False, 'check_sudden_change': False},
+])
+def test_append_matches_full_recompute(options):
+    _s = make_test_frame(n_periods=80)['metric_0']
+    _s.iloc[[30, 55]] = np.nan
+
+    _pipeline = MetricEvaluationPipeline(_s.iloc[:10], **options)
+    for period, value in _s.iloc[10:50].items():
+        _pipeline.append(period, value)
+
+    # Reading results in between appends must not change the outcome
+    assert len(_pipeline.results) == 50
+    _pipeline.extend(_s.iloc[50:])
+
+    _expected = MetricEvaluationPipeline(_s, **options)
+    pd.testing.assert_frame_equal(_pipeline.results, _expected.results, check_freq=False)
+    pd.testing.assert_series_equal(_pipeline.s, _expected.s, check_freq=False)
+
+
+def test_evaluate_last_n_periods_matches_current_record():
+    _s = make_test_frame()['metric_0']
+    _options = {'check_change_in_steady_state_long': True, 'disable_warnings': True}
+
+    _pipeline = MetricEvaluationPipeline(_s, evaluate_last_n_periods=1, **_options)
+    _expected = MetricEvaluationPipeline(_s, **_options)
+
+    assert _pipeline.get_current_record() == _expected.get_current_record()
+    assert _pipeline.results['general_actionability_score'].iloc[:-1].isnull().all()
+    assert _pipeline.results['is_valence_ambiguous'].dtype == bool
+
+
+def test_appended_periods_are_evaluated_with_evaluate_last_n_periods():
+    _s = make_test_frame(n_periods=25)['metric_0']
+    _options = {'outside_of_normal_range_rolling_calculation_periods': 30}
+
+    # The rolling window is longer than the series, so every append recomputes the checks
+    _pipeline = MetricEvaluationPipeline(_s.iloc[:20], evaluate_last_n_periods=1, **_options)
+    _pipeline.extend(_s.iloc[20:])
+
+    pd.testing.assert_frame_equal(
+        _pipeline.results.tail(6),
+        MetricEvaluationPipeline(_s, **_options).results.tail(6),
+        check_freq=False,
+    )
+    assert _pipeline.results['general_actionability_score'].iloc[:-6].isnull().all()
+
+
+@pytest.mark.parametrize('record, expected_score, expected_is_valence_ambiguous', [
+    ({'a': 0.0, 'b': 0.0}, 0.0, False),
+    ({'a': 0.2, 'b': -0.7}, -0.7, True),
+    ({'a': 0.5, 'b': -0.5}, 0.5, True),
+    ({'a': 1.2, 'b': 0.3}, 1.2, False),
+    ({'a': np.nan, 'b': -0.4}, -0.4, False),
+    ({'a': np.nan, 'b': np.nan}, np.nan, False),
+])
+def test_combine_actionability_scores(record, expected_score, expected_is_valence_ambiguous):
+    _combined = MetricEvaluationPipeline.combine_actionability_scores(record)
+
+    np.testing.assert_equal(_combined['general_actionability_score'], expected_score)
+    assert _combined['is_valence_ambiguous'] is expected_is_valence_ambiguous
+
+
+def test_current_record_is_refreshed_after_append():
+    _s = make_test_frame()['metric_0']
+    _pipeline = MetricEvaluationPipeline(_s.iloc[:-2])
+
+    assert _pipeline.get_current_record() == _pipeline.results.to_dict(orient='records')[-1]
+
+    # Changes to a returned record do not leak into the cache
+    _pipeline.get_current_record()['period_value'] = None
+    assert _pipeline.get_current_record()['period_value'] == _s.iloc[-3]
+
+    for period, value in _s.iloc[-2:].items():
+        _pipeline.append(period, value)
+        assert _pipeline.get_current_record()['period_value'] == value
+
+    _expected = MetricEvaluationPipeline(_s).get_current_record()
+    assert _pipeline.get_current_record() == _expected
+    assert _pipeline.results.to_dict(orient='records')[-1] == _expected
+
+
+def test_results_schema():
+    _s = make_test_frame()['metric_0']
+    _options = {
+        'results_columns': ['normal_range_actionability_score', 'sudden_change_actionability_score'],
+        'results_float_dtype': 'float32',
+    }
+
+    _pipeline = MetricEvaluationPipeline(_s.iloc[:-1], **_options)
+    _pipeline.append(_s.index[-1], _s.iloc[-1])
+
+    assert list(_pipeline.results.columns) == [
+        'period_value', 'normal_range_actionability_score', 'sudden_change_actionability_score',
+        'general_actionability_score', 'is_valence_ambiguous',
+    ]
+    assert (_pipeline.results.dtypes.drop('is_valence_ambiguous') == np.float32).all()
+    assert _pipeline.results['is_valence_ambiguous'].dtype == bool
+
+    _expected = MetricEvaluationPipeline(_s).results[_pipeline.results.columns]
+    pd.testing.assert_frame_equal(_pipeline.results, _expected.astype(_pipeline.results.dtypes), check_freq=False)
+
+
+def test_results_schema_without_intermediates():
+    _results = MetricEvaluationPipeline(
+        make_test_frame()['metric_0'],
+        check_change_in_steady_state_long=True,
+        disable_warnings=True,
+        keep_intermediates=False,
+    ).results
+
+    assert 'most_recent_period_change' not in _results.columns
+    assert 'mean_of_historical_training_values' not in _results.columns
+    assert 'current_long_run' in _results.columns
+    assert _results.drop(columns='is_valence_ambiguous').dtypes.eq(np.float64).all()
+
+
+@pytest.mark.parametrize('results_columns', [['period_value'], ['period_value', 'normal_range_actionability_score']])
+def test_results_schema_keeps_columns_used_by_displays(results_columns):
+    _s = make_test_frame()['metric_0']
+    _pipeline = MetricEvaluationPipeline(
+        _s, check_change_in_steady_state_long=True, disable_warnings=True, results_columns=results_columns,
+    )
+    _full_pipeline = MetricEvaluationPipeline(_s, check_change_in_steady_state_long=True, disable_warnings=True)
+
+    assert list(_pipeline.results.columns) == [
+        'period_value', 'normal_range_actionability_score', 'sudden_change_actionability_score',
+        'change_in_steady_state_long_actionability_score', 'current_long_run',
+        'general_actionability_score', 'is_valence_ambiguous',
+    ]
+
+    _display_record = _pipeline.get_current_display_record(sparkline=False)
+    assert _display_record['Actionability Score'] == _full_pipeline.get_current_actionability_status()
+
+    # Threshold lines that were not selected are left out of the chart
+    _figure = _pipeline.display_actionability_time_series(return_html=False)
+    assert [trace.name for trace in _figure.data] == ['Actionability', 'Historical Alerts', 'Period Value']
+
+
+@pytest.mark.parametrize('format_html_text', [True, False])
+def test_write_actionability_summaries_matches_single_records(format_html_text):
+    _pipeline = MetricEvaluationPipeline(
+        make_test_frame(n_periods=120)['metric_0'].cumsum(),
+        check_change_in_steady_state_long=True,
+        disable_warnings=True,
+    )
+    _results = _pipeline.results.dropna()
+
+    assert _pipeline.write_actionability_summaries(_results, format_html_text=format_html_text) == [
+        _pipeline.write_actionability_summary(record, format_html_text=format_html_text)
+        for record in _results.to_dict(orient='records')
+    ]
+
+
+def test_display_actionability_time_series_max_points():
+    _s = pd.Series(
+        np.random.default_rng(0).normal(100, 5, 2000),
+        index=pd.date_range('2021-01-01', periods=2000, freq='H'),
+        name='test_metric',
+    )
+    _s.iloc[[700, 1500]] += 200
+    _annotations = {_s.index[1000]: 'Launch'}
+
+    _pipeline = MetricEvaluationPipeline(_s)
+    _figure = _pipeline.display_actionability_time_series(return_html=False, annotations=_annotations)
+    _downsampled_figure = _pipeline.display_actionability_time_series(
+        return_html=False, annotations=_annotations, max_points=200,
+    )
+
+    # Actionable and annotated periods are always kept, on top of the shape-preserving points
+    _n_kept = (_pipeline.results.dropna()['general_actionability_score'] != 0).sum() + 1
+
+    for trace, downsampled_trace in zip(_figure.data, _downsampled_figure.data):
+        if trace.mode == 'markers':
+            assert list(downsampled_trace.x) == list(trace.x)
+        else:
+            assert len(downsampled_trace.x) <= max(200, _n_kept + 3) < len(trace.x)
+            assert set(_downsampled_figure.data[0].x) == set(downsampled_trace.x)
+
+    _line_x = set(_downsampled_figure.data[-1].x)
+    assert {_s.index[700], _s.index[1000], _s.index[1500], _s.index[-1]} <= _line_x
+
+
+def test_display_actionability_time_series_webgl():
+    _pipeline = MetricEvaluationPipeline(make_test_frame()['metric_0'])
+
+    _figure = _pipeline.display_actionability_time_series(return_html=False)
+    _webgl_figure = _pipeline.display_actionability_time_series(return_html=False, render_mode='webgl')
+
+    # Only the trace types differ
+    _figure_json, _webgl_figure_json = json.loads(_figure.to_json()), json.loads(_webgl_figure.to_json())
+    assert _webgl_figure_json['layout'] == _figure_json['layout']
+    assert _webgl_figure_json['data'] == [dict(trace, type='scattergl') for trace in _figure_json['data']]
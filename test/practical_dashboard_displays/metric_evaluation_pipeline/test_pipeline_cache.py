@@ -0,0 +1,143 @@
+import os
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from mode_notebook_assets.practical_dashboard_displays.metric_evaluation_pipeline.metric_evaluation_pipeline import \
+    MetricEvaluationPipeline
+from mode_notebook_assets.practical_dashboard_displays.metric_evaluation_pipeline.pipeline_cache import \
+    results_cache, MemoryResultsCache, DiskResultsCache, get_disk_results_cache, make_results_cache_key
+
+
+def make_test_series(n_periods=60, seed=0) -> pd.Series:
+    return pd.Series(
+        np.random.default_rng(seed).normal(100, 15, n_periods).round(),
+        index=pd.date_range('2021-01-01', periods=n_periods),
+        name='test_metric',
+    )
+
+
+def test_pipeline_results_are_cached():
+    results_cache.clear()
+    _s = make_test_series()
+
+    _pipeline = MetricEvaluationPipeline(_s)
+    assert results_cache.cache_info()[:2] == (0, 1)
+
+    _cached_pipeline = MetricEvaluationPipeline(_s.copy(), metric_name='Renamed', good_palette=['#00ff00'])
+    assert results_cache.cache_info()[:2] == (1, 1)
+    pd.testing.assert_frame_equal(_cached_pipeline.results, _pipeline.results)
+
+    # Cached results are copies
+    _cached_pipeline.results['period_value'] = 0
+    pd.testing.assert_frame_equal(MetricEvaluationPipeline(_s).results, _pipeline.results)
+
+    # Any change to the values, index, name or check configuration is a different entry
+    _changed_value = _s.copy()
+    _changed_value.iloc[10] += 1
+    for s, options in [
+        (_changed_value, {}),
+        (_s.shift(1, freq='D'), {}),
+        (_s.rename('other_metric'), {}),
+        (_s, {'sudden_change_minimum_periods': 8}),
+        (_s, {'evaluate_last_n_periods': 1}),
+    ]:
+        _misses = results_cache.misses
+        MetricEvaluationPipeline(s, **options)
+        assert results_cache.misses == _misses + 1
+
+    _hits = results_cache.hits
+    MetricEvaluationPipeline(_s, use_results_cache=False)
+    assert results_cache.cache_info()[:2] == (_hits, _misses + 1)
+
+
+def test_memory_results_cache_evicts_least_recently_used():
+    _cache = MemoryResultsCache(maxsize=2)
+    _frame = pd.DataFrame({'x': [1.0]})
+
+    _cache.put('a', _frame)
+    _cache.put('b', _frame)
+    assert _cache.get('a') is not None
+    _cache.put('c', _frame)
+
+    assert _cache.get('b') is None
+    assert _cache.get('a') is not None and _cache.get('c') is not None
+    assert _cache.cache_info() == (3, 1, 2, 2)
+
+
+@pytest.mark.parametrize('s, options', [
+    (make_test_series(), {}),
+    (make_test_series().tz_localize('US/Eastern'), {'results_float_dtype': 'float32'}),
+    (make_test_series().reset_index(drop=True).astype(int), {'check_change_in_steady_state_long': True,
+                                                             'disable_warnings': True}),
+    (make_test_series().set_axis([f'period {i}' for i in range(60)]), {'keep_intermediates': False}),
+    (make_test_series().rename(None), {'check_outside_of_normal_range': False, 'check_sudden_change': False}),
+])
+def test_disk_results_cache_round_trip(tmp_path, s, options):
+    results_cache.clear()
+    _pipeline = MetricEvaluationPipeline(s, cache_dir=str(tmp_path), **options)
+    assert len(os.listdir(tmp_path)) == 1
+
+    results_cache.clear()
+    _disk_results_cache = get_disk_results_cache(str(tmp_path))
+    _hits = _disk_results_cache.hits
+
+    pd.testing.assert_frame_equal(MetricEvaluationPipeline(s, cache_dir=str(tmp_path), **options).results,
+                                  _pipeline.results)
+    assert _disk_results_cache.hits == _hits + 1
+
+
+def test_disk_results_cache_evicts_oldest_entries(tmp_path):
+    _cache = DiskResultsCache(str(tmp_path))
+    _frame = pd.DataFrame({'x': np.arange(100.0)})
+
+    for i, key in enumerate(['a', 'b', 'c']):
+        _cache.put(key, _frame)
+        os.utime(tmp_path / f'{key}.npz', (time.time() - 100 + i, time.time() - 100 + i))
+
+    # Reading an entry makes it the most recent
+    assert _cache.get('a') is not None
+
+    _cache.max_bytes = 2 * os.path.getsize(tmp_path / 'a.npz')
+    _cache.put('d', _frame)
+
+    assert sorted(os.listdir(tmp_path)) == ['a.npz', 'd.npz']
+
+    (tmp_path / 'a.npz').write_bytes(b'not an npz file')
+    assert _cache.get('a') is None and _cache.get('b') is None
+
+
+def test_disk_results_cache_counts_rewritten_entries_once(tmp_path):
+    _cache = DiskResultsCache(str(tmp_path))
+    _frame = pd.DataFrame({'x': np.arange(100.0)})
+
+    _cache.put('a', _frame)
+    _cache.put('b', _frame)
+    _total_bytes = _cache.cache_info().currsize
+
+    for _ in range(3):
+        _cache.put('b', _frame)
+
+    assert _cache.cache_info().currsize == _total_bytes == sum(f.stat().st_size for f in tmp_path.iterdir())
+
+
+def test_results_cache_key_changes_with_package_version(tmp_path, monkeypatch):
+    _s = make_test_series()
+    _configuration = ('outside_of_normal_range', 8)
+    _key = make_results_cache_key(_s, _configuration)
+
+    MetricEvaluationPipeline(_s, cache_dir=str(tmp_path))
+
+    monkeypatch.setattr('mode_notebook_assets.version.__version__', '999.0.0')
+    assert make_results_cache_key(_s, _configuration) != _key
+
+    # Results stored by the earlier version are not reused
+    results_cache.clear()
+    _disk_results_cache = get_disk_results_cache(str(tmp_path))
+    _misses = _disk_results_cache.cache_info().misses
+
+    MetricEvaluationPipeline(_s, cache_dir=str(tmp_path))
+    assert _disk_results_cache.cache_info().misses == _misses + 1
+    assert len(os.listdir(tmp_path)) == 2
@@ -0,0 +1,135 @@
+import re
+
+import numpy as np
+import pandas as pd
+import pytest
+from plotly.offline import get_plotlyjs
+
+from mode_notebook_assets.practical_dashboard_displays import DatasetEvaluationGenerator, \
+    convert_metric_status_table_to_html, make_metric_collection_display
+
+
+def make_test_frame(n_rows=2000, seed=0) -> pd.DataFrame:
+    _rng = np.random.default_rng(seed)
+
+    return pd.DataFrame({
+        'date':    _rng.choice(pd.date_range('2021-01-01', periods=60), n_rows),
+        'country': _rng.choice(['CA', 'US', 'MX'], n_rows),
+        'channel': _rng.choice(['web', 'retail'], n_rows),
+        'sales':   _rng.normal(100, 15, n_rows),
+    })
+
+
+def test_grouping_set_series_lookup():
+    _df = make_test_frame()
+    _df.loc[:10, 'country'] = None
+
+    _lookup = DatasetEvaluationGenerator(
+        _df.set_index('date'), ['country', 'channel'], 'date', 'sales', title_format_template='{} ({})',
+    ).generate_grouping_set_series_lookup()
+
+    _totals = _df.groupby(['country', 'channel'])['sales'].sum().sort_values(ascending=False)
+    assert list(_lookup) == [f'{country} ({channel})' for country, channel in _totals.index]
+
+    for (country, channel), key in zip(_totals.index, _lookup):
+        pd.testing.assert_series_equal(
+            _lookup[key],
+            _df[(_df['country'] == country) & (_df['channel'] == channel)].groupby('date').sum()['sales'],
+        )
+
+
+def test_pipeline_lookup_is_reused_per_option_set():
+    _generator = DatasetEvaluationGenerator(make_test_frame(), ['country'], 'date', 'sales')
+
+    _pipeline_lookup = _generator.generate_grouping_set_metric_pipeline_lookup()
+    assert _generator.generate_grouping_set_metric_pipeline_lookup({}) is _pipeline_lookup
+
+    _palette_options = {'good_palette': ['#00ff00']}
+    assert _generator.generate_grouping_set_metric_pipeline_lookup(_palette_options) is not _pipeline_lookup
+    assert _generator.generate_grouping_set_metric_pipeline_lookup(
+        {'good_palette': ['#00ff00']}
+    ) is _generator.generate_grouping_set_metric_pipeline_lookup(_palette_options)
+
+    assert len(_generator.generate_actionability_time_series_figures()) == 3
+    assert _generator.generate_grouping_set_metric_pipeline_lookup() is _pipeline_lookup
+
+
+def test_actionability_time_series_grid_includes_plotlyjs_once():
+    _generator = DatasetEvaluationGenerator(make_test_frame(), ['country'], 'date', 'sales')
+    _plotlyjs = get_plotlyjs()
+
+    _html = _generator.display_actionability_time_series_grid()
+    assert _html.count(_plotlyjs) == 3
+
+    _html = _generator.display_actionability_time_series_grid(plotly_div_grid_options={'include_plotlyjs': True})
+    assert _html.count(_plotlyjs) == 1 and _html.count('Plotly.newPlot(') == 3
+    assert '<html>' not in _html
+
+    _html = _generator.display_actionability_time_series_grid(plotly_div_grid_options={'include_plotlyjs': 'cdn'})
+    assert _html.count('<script src="https://cdn.plot.ly/') == 1 and _html.count('Plotly.newPlot(') == 3
+
+
+def test_metric_collection_display_passes_pipeline_options():
+    _df = make_test_frame()
+    _metric_specifications = [
+        {'time_series': _df[_df['country'] == country].groupby('date')['sales'].sum(), 'name': country}
+        for country in ['CA', 'US', 'MX']
+    ]
+
+    def _without_uuid(html):
+        return re.sub(r'T_[0-9a-f]{5}', 'T_uuid', html)
+
+    # Only the current period is evaluated by default, which does not change the display
+    assert _without_uuid(make_metric_collection_display(_metric_specifications)) == _without_uuid(
+        make_metric_collection_display(
+            _metric_specifications, metric_evaluation_pipeline_options={'evaluate_last_n_periods': None}
+        )
+    )
+
+    with pytest.raises(TypeError):
+        make_metric_collection_display(_metric_specifications, metric_evaluation_pipeline_options={'unknown': 1})
+
+
+@pytest.mark.parametrize('options', [
+    {},
+    {'include_actionability_score': True, 'sort_records_by_actionability': True, 'title': 'Status'},
+    {'auto_detect_percentages': True, 'sort_records_by_value': True},
+    {'display_current_value_bars': False, 'sort_records_by_name': True, 'limit_rows': 5},
+    {'limit_rows': 0},
+])
+def test_fast_status_table_renderer_matches_styler(options):
+    _rng = np.random.default_rng(0)
+    _df = pd.DataFrame({
+        'Metric':              [f'metric_{i}' for i in range(12)],
+        'Current Value':       np.append(_rng.normal(10, 20, 11), np.nan),
+        'Actionability Score': _rng.choice([0, .5, -1.0], 12),
+        'Status Dot':          ['<span>dot</span>'] * 12,
+        'URL':                 ['https://example.com', None, ''] * 4,
+    })
+
+    def _without_uuid(html):
+        return re.sub(r'T_[0-9a-f]{5}', 'T_uuid', html)
+
+    assert _without_uuid(convert_metric_status_table_to_html(_df, renderer='fast', **options)) == _without_uuid(
+        convert_metric_status_table_to_html(_df, renderer='styler', **options)
+    )
+
+
+def test_lazy_actionability_time_series_grid_keeps_figures_inert():
+    _generator = DatasetEvaluationGenerator(make_test_frame(), ['country'], 'date', 'sales')
+
+    _html = _generator.display_actionability_time_series_grid(
+        plotly_div_grid_options={'lazy': True, 'max_live_cells': 2}
+    )
+
+    # plotly.js is loaded once, ahead of the grid, and each figure is drawn from inside its template
+    assert _html.count(get_plotlyjs()) == 1 and _html.index(get_plotlyjs()) < _html.index('<template>')
+    assert _html.count('<template>') == 3 and _html.count('Plotly.newPlot(') == 3
+    assert re.fullmatch(r'(<template>.*?Plotly\.newPlot\(.*?</template>.*?){3}', _html[_html.index('<template>'):],
+                        flags=re.DOTALL)
+    assert 'new IntersectionObserver' in _html and 'var maxLiveCells = 2;' in _html
+
+    _html = _generator.display_actionability_time_series_grid(
+        plotly_div_grid_options={'lazy': True, 'include_plotlyjs': 'cdn'}
+    )
+    assert _html.startswith('<script src="https://cdn.plot.ly/') and get_plotlyjs() not in _html
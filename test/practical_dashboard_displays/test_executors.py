@@ -0,0 +1,55 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from mode_notebook_assets.practical_dashboard_displays import DatasetEvaluationGenerator
+from mode_notebook_assets.practical_dashboard_displays.executors import map_with_executor, get_executor_pool, \
+    shutdown_executor_pools
+
+
+def test_map_with_executor_keeps_input_order():
+    for executor in ['serial', 'thread', 'process']:
+        assert map_with_executor(pow, range(20), [2] * 20, executor=executor, max_workers=2, chunksize=3) == [
+            x ** 2 for x in range(20)
+        ]
+
+    assert get_executor_pool('process', 2) is get_executor_pool('process', 2)
+
+
+@pytest.mark.parametrize('executor', ['thread', 'process'])
+def test_dataset_evaluation_generator_executors_match_serial(executor):
+    _n_groups, _n_periods = 6, 30
+    _df = pd.DataFrame({
+        'date':  np.tile(pd.date_range('2021-01-01', periods=_n_periods), _n_groups),
+        'group': np.repeat([f'group_{i}' for i in range(_n_groups)], _n_periods),
+        'value': np.random.default_rng(0).normal(100, 15, _n_groups * _n_periods),
+    })
+
+    _options = {'get_current_display_record_options': {'sparkline_backend': 'svg', 'status_dot_backend': 'svg'}}
+    _figure_options = {'actionability_time_series_options': {'return_html': False}}
+
+    _generator = DatasetEvaluationGenerator(_df, ['group'], 'date', 'value', executor=executor, max_workers=2,
+                                            chunksize=2)
+    _serial_generator = DatasetEvaluationGenerator(_df, ['group'], 'date', 'value')
+
+    assert _generator.generate_actionability_summary_records(**_options) == \
+        _serial_generator.generate_actionability_summary_records(**_options)
+    assert [
+        figure.to_json() for figure in _generator.generate_actionability_time_series_figures(**_figure_options)
+    ] == [
+        figure.to_json() for figure in _serial_generator.generate_actionability_time_series_figures(**_figure_options)
+    ]
+
+    # Process workers build and render each pipeline themselves, so no pipelines are sent back
+    assert (_generator._pipeline_lookups == []) == (executor == 'process')
+
+
+def test_concurrent_first_calls_share_one_pool():
+    shutdown_executor_pools()
+
+    with ThreadPoolExecutor(max_workers=8) as _callers:
+        _pools = list(_callers.map(lambda _: get_executor_pool('thread', 3), range(32)))
+
+    assert all(pool is _pools[0] for pool in _pools)
@@ -0,0 +1,19 @@
+import numpy as np
+
+from mode_notebook_assets.practical_dashboard_displays.helper_functions import largest_triangle_three_buckets
+
+
+def test_largest_triangle_three_buckets():
+    _x = np.arange(1000)
+    _y = np.sin(_x / 50)
+    _y[437] = 10
+
+    _selected = largest_triangle_three_buckets(_x, _y, 50)
+    assert len(_selected) == 50 and _selected[0] == 0 and _selected[-1] == 999
+    assert 437 in _selected and (np.diff(_selected) > 0).all()
+
+    _keep = np.isin(_x, [3, 500, 998])
+    _selected = largest_triangle_three_buckets(_x, _y, 50, keep=_keep)
+    assert len(_selected) <= 50 and {3, 500, 998} <= set(_selected)
+
+    assert list(largest_triangle_three_buckets(_x[:10], _y[:10], 50)) == list(range(10))
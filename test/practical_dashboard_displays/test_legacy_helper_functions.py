@@ -0,0 +1,100 @@
+import re
+
+import numpy as np
+import pytest
+from matplotlib import pyplot as plt
+from plotly import graph_objects as go
+
+from mode_notebook_assets.practical_dashboard_displays.legacy_helper_functions import \
+    map_actionability_score_to_color, get_actionability_color_mapper, sparkline, dot, render_dot_body, \
+    get_scatter_trace_type, WEBGL_POINT_THRESHOLD
+
+
+GOOD_PALETTE = ['rgb(0,10,0)', 'rgb(0,20,0)', 'rgb(0,30,0)']
+BAD_PALETTE = ['rgb(10,0,0)', 'rgb(20,0,0)', 'rgb(30,0,0)']
+AMBIGUOUS_PALETTE = ['rgb(0,0,10)', 'rgb(0,0,20)']
+
+
+@pytest.mark.parametrize('score, is_valence_ambiguous, expected_color', [
+    (0, False, 'rgb(211,211,211)'),
+    (0.2, False, 'rgb(0,10,0)'),
+    (0.5, False, 'rgb(0,20,0)'),
+    (3.0, False, 'rgb(0,30,0)'),
+    (-0.7, False, 'rgb(20,0,0)'),
+    (-0.7, True, 'rgb(0,0,10)'),
+    (np.nan, False, 'rgb(0,0,20)'),
+])
+def test_map_actionability_score_to_color(score, is_valence_ambiguous, expected_color):
+    assert map_actionability_score_to_color(
+        score,
+        is_valence_ambiguous=is_valence_ambiguous,
+        good_palette=GOOD_PALETTE,
+        bad_palette=BAD_PALETTE,
+        ambiguous_palette=AMBIGUOUS_PALETTE,
+    ) == expected_color
+
+
+@pytest.mark.parametrize('is_higher_good, is_lower_good', [(True, False), (False, True), (True, True), (False, False)])
+def test_color_mapper_matches_single_scores(is_higher_good, is_lower_good):
+    _scores = np.array([0, 0.01, -0.01, 0.49, 0.5, -0.5, 0.99, 1, -1, 1.5, -12, np.nan])
+    _is_valence_ambiguous = np.arange(len(_scores)) % 3 == 0
+
+    _mapper = get_actionability_color_mapper(
+        good_palette=GOOD_PALETTE,
+        bad_palette=BAD_PALETTE,
+        is_higher_good=is_higher_good,
+        is_lower_good=is_lower_good,
+    )
+
+    assert _mapper is get_actionability_color_mapper(
+        good_palette=GOOD_PALETTE,
+        bad_palette=BAD_PALETTE,
+        is_higher_good=is_higher_good,
+        is_lower_good=is_lower_good,
+    )
+    assert _mapper.map_scores(_scores, is_valence_ambiguous=_is_valence_ambiguous) == [
+        map_actionability_score_to_color(
+            score,
+            is_valence_ambiguous=is_valence_ambiguous,
+            is_higher_good=is_higher_good,
+            is_lower_good=is_lower_good,
+            good_palette=GOOD_PALETTE,
+            bad_palette=BAD_PALETTE,
+        ) for score, is_valence_ambiguous in zip(_scores, _is_valence_ambiguous)
+    ]
+    assert _mapper.map_scores([0.5, 0], hex_colors=True)[1] == '#d3d3d3'
+
+
+def test_svg_sparkline():
+    _html = sparkline([3, 1, np.nan, 4, 1, 5], figsize=(2, .25), backend='svg')
+
+    assert plt.get_fignums() == []
+    assert _html.startswith('<svg') and 'width="200" height="25"' in _html
+
+    # The null value splits the line, and the last point is emphasized
+    _path = re.search(r' d="([^"]*)"', _html).group(1)
+    assert _path.count('M') == 2 and _path.count('L') == 3
+    assert re.search(r'<circle cx="189.00" cy="3.41"', _html)
+
+
+def test_dot_renders_each_color_once():
+    render_dot_body.cache_clear()
+
+    _svg_dot = dot('#000a00', (.5, .5), title_text='Steady', backend='svg')
+    assert plt.get_fignums() == []
+    assert 'title="Steady"' in _svg_dot and '<ellipse' in _svg_dot and 'fill="#000a00"' in _svg_dot
+
+    _png_dot = dot('#000a00', (.5, .5), title_text='Steady')
+    assert _png_dot.startswith('<img') and 'src="data:image/png;base64,' in _png_dot
+    assert dot('#000a00', (.5, .5), title_text='Steady') == _png_dot
+    assert render_dot_body.cache_info().hits == 1
+
+
+@pytest.mark.parametrize('render_mode, n_points, expected_trace_type', [
+    ('svg', 10 ** 6, go.Scatter),
+    ('webgl', 10, go.Scattergl),
+    ('auto', WEBGL_POINT_THRESHOLD, go.Scatter),
+    ('auto', WEBGL_POINT_THRESHOLD + 1, go.Scattergl),
+])
+def test_get_scatter_trace_type(render_mode, n_points, expected_trace_type):
+    assert get_scatter_trace_type(render_mode, n_points) is expected_trace_type
@@ -0,0 +1,248 @@
+from importlib.util import find_spec
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from mode_notebook_assets.practical_dashboard_displays import legacy_metric_check
+from mode_notebook_assets.practical_dashboard_displays.legacy_metric_check import \
+    create_output_column_for_rolling_period, create_output_frame_for_rolling_period, outside_of_normal_range, \
+    sudden_change, _sudden_change_point_in_time, change_in_steady_state_long, outside_of_normal_range_batch, \
+    sudden_change_batch, calculate_window_statistics, WindowStatisticsState
+from test.practical_dashboard_displays import original_legacy_metric_check
+
+
+def make_test_series(n_periods=60, seed=0) -> pd.Series:
+    return pd.Series(
+        np.random.default_rng(seed).normal(100, 15, n_periods).round(),
+        index=pd.date_range('2021-01-01', periods=n_periods),
+        name='test_metric',
+    )
+
+
+def test_rolling_period_executor_collects_every_output():
+    def _custom_point_in_time(values, local_minimum_n_periods):
+        return {
+            'window_length': len(values),
+            'window_range':  values[-1] - values[0],
+        }
+
+    _s = make_test_series()
+    _output = create_output_frame_for_rolling_period(
+        _custom_point_in_time,
+        _s,
+        minimum_periods=3,
+        rolling_calculation_periods=5,
+    )
+
+    assert list(_output.columns) == ['window_length', 'window_range']
+    assert _output['window_length'].isnull().sum() == 4
+    assert (_output['window_length'].dropna() == 5).all()
+    pd.testing.assert_series_equal(
+        _output['window_range'],
+        _s - _s.shift(4),
+        check_names=False,
+    )
+
+
+def test_rolling_period_executor_raw_and_series_windows_match():
+    _s = make_test_series()
+    _series_output = pd.DataFrame(_s)
+
+    create_output_column_for_rolling_period(
+        _sudden_change_point_in_time,
+        _series_output,
+        'sudden_change_actionability_score',
+        minimum_periods=7,
+        rolling_calculation_periods=None,
+        apply_to_colname='test_metric',
+    )
+
+    pd.testing.assert_series_equal(
+        _series_output['sudden_change_actionability_score'],
+        create_output_frame_for_rolling_period(
+            _sudden_change_point_in_time,
+            _s,
+            minimum_periods=7,
+            rolling_calculation_periods=None,
+        )['sudden_change_actionability_score'],
+    )
+
+
+def make_random_test_series(seed: int) -> pd.Series:
+    _rng = np.random.default_rng(seed)
+    _n_periods = int(_rng.integers(1, 120))
+    _kind = seed % 4
+
+    if _kind == 0:
+        # Small integer values produce ties with means and thresholds
+        _values = _rng.integers(0, 4, _n_periods).astype(float)
+    elif _kind == 1:
+        # Random walks produce long runs on one side of the mean
+        _values = np.cumsum(_rng.normal(0.2, 1, _n_periods))
+    elif _kind == 2:
+        _values = _rng.normal(100, 15, _n_periods)
+        _values[_rng.integers(0, _n_periods, 3)] = np.nan
+    else:
+        _values = _rng.normal(100, 15, _n_periods)
+
+    return pd.Series(_values, name='test_metric')
+
+
+PARITY_TEST_CHECKS = [
+    (outside_of_normal_range, {'minimum_periods': 8}),
+    (outside_of_normal_range, {'minimum_periods': 8, 'rolling_calculation_periods': 12}),
+    (sudden_change, {'minimum_periods': 7}),
+    (sudden_change, {'minimum_periods': 7, 'rolling_calculation_periods': 12}),
+    (change_in_steady_state_long, {'minimum_periods': 14}),
+]
+
+
+@pytest.mark.parametrize('engine', [
+    'numpy',
+    pytest.param('numba', marks=pytest.mark.skipif(find_spec('numba') is None, reason='numba is not installed')),
+])
+@pytest.mark.parametrize('check, check_options', PARITY_TEST_CHECKS)
+def test_engines_match_reference_implementation(engine, check, check_options):
+    for seed in range(40):
+        _s = make_random_test_series(seed)
+
+        pd.testing.assert_frame_equal(
+            check(_s, engine=engine, **check_options),
+            check(_s, engine='python', **check_options),
+            check_exact=False,
+            rtol=1e-7,
+            atol=1e-9,
+        )
+
+
+def test_invalid_engine():
+    with pytest.raises(AssertionError):
+        sudden_change(make_test_series(), engine='fortran')
+
+
+@pytest.mark.parametrize('check, batch_check, check_options', [
+    (outside_of_normal_range, outside_of_normal_range_batch, {'minimum_periods': 8}),
+    (outside_of_normal_range, outside_of_normal_range_batch, {'minimum_periods': 8, 'rolling_calculation_periods': 12}),
+    (sudden_change, sudden_change_batch, {'minimum_periods': 7}),
+    (sudden_change, sudden_change_batch, {'minimum_periods': 7, 'rolling_calculation_periods': 12}),
+])
+def test_batch_checks_match_single_series_checks(check, batch_check, check_options):
+    _df = pd.DataFrame({f'metric_{seed}': make_test_series(seed=seed) for seed in range(5)})
+    _df.iloc[:3, 1] = np.nan
+
+    _output = batch_check(_df, **check_options)
+
+    assert list(_output.columns.get_level_values('metric').unique()) == list(_df.columns)
+
+    for colname in _df.columns:
+        pd.testing.assert_frame_equal(
+            _output[colname].rename_axis(columns=None),
+            check(_df[colname], **check_options).drop(columns=colname),
+        )
+
+
+@pytest.mark.parametrize('rolling_calculation_periods', [None, 1, 2, 12])
+def test_window_statistics_state_matches_calculate_window_statistics(rolling_calculation_periods):
+    for seed in range(12):
+        _values = make_random_test_series(seed).to_numpy()
+        _state = WindowStatisticsState(minimum_periods=3, rolling_calculation_periods=rolling_calculation_periods)
+
+        for i, value in enumerate(_values):
+            _state.push(value)
+            _statistics = _state.statistics()
+            _expected = calculate_window_statistics(
+                _values[:i + 1],
+                minimum_periods=3,
+                rolling_calculation_periods=rolling_calculation_periods,
+            )
+
+            for key, expected in _expected.items():
+                np.testing.assert_allclose(_statistics[key], expected[-1], rtol=1e-9, atol=1e-9, err_msg=key)
+
+
+@pytest.mark.parametrize('engine', ['python', 'numpy'])
+@pytest.mark.parametrize('check, check_options', PARITY_TEST_CHECKS)
+def test_evaluate_last_n_periods(engine, check, check_options):
+    for seed in range(12):
+        _s = make_random_test_series(seed)
+        _expected = check(_s, engine=engine, **check_options)
+        _output = check(_s, engine=engine, evaluate_last_n_periods=5, **check_options)
+
+        pd.testing.assert_frame_equal(_output.tail(5), _expected.tail(5))
+        pd.testing.assert_frame_equal(_output.iloc[:-5, :2], _expected.iloc[:-5, :2])
+        assert _output.iloc[:-5, 2:].isnull().all().all()
+
+
+@pytest.mark.parametrize('rolling_calculation_periods', [None, 30])
+def test_window_statistics_keep_precision_for_large_values(rolling_calculation_periods):
+    _values = 1e9 + np.random.default_rng(0).normal(0, 1, 20000)
+    _values[:3] = np.nan
+    _s = pd.Series(_values)
+
+    _windows = _s.rolling(rolling_calculation_periods) if rolling_calculation_periods else _s.expanding()
+    _statistics = calculate_window_statistics(_values, minimum_periods=8,
+                                              rolling_calculation_periods=rolling_calculation_periods)
+
+    np.testing.assert_allclose(_statistics['mean_of_historical_values'][100:], _windows.mean()[100:], rtol=0, atol=1e-6)
+
+
+@pytest.mark.parametrize('engine', [
+    'numpy',
+    pytest.param('numba', marks=pytest.mark.skipif(find_spec('numba') is None, reason='numba is not installed')),
+])
+def test_change_in_steady_state_long_handles_nulls_incrementally(engine):
+    _rng = np.random.default_rng(0)
+
+    for seed in range(60):
+        _values = _rng.integers(0, 3, int(_rng.integers(1, 90))).astype(float)
+        _values[_rng.random(len(_values)) < [0.05, 0.3, 0.6][seed % 3]] = np.nan
+        if seed % 5 == 0:
+            # Every training value is null
+            _values[:len(_values) // 2] = np.nan
+        _s = pd.Series(_values, name='test_metric')
+
+        pd.testing.assert_frame_equal(
+            change_in_steady_state_long(_s, minimum_periods=4, engine=engine),
+            change_in_steady_state_long(_s, minimum_periods=4, engine='python'),
+        )
+
+
+def make_tie_prone_test_series(seed: int) -> pd.Series:
+    _rng = np.random.default_rng(seed)
+    _n_periods = int(_rng.integers(15, 80))
+
+    # Values rounded to one decimal often equal the mean up to rounding error
+    if seed % 2 == 0:
+        _values = _rng.choice([0.1, 0.2, 0.3], _n_periods)
+    else:
+        _values = _rng.normal(0, 1, _n_periods).round(1)
+    if seed % 3 == 0:
+        _values[_rng.integers(0, _n_periods, 3)] = np.nan
+
+    return pd.Series(_values, index=pd.date_range('2021-01-01', periods=_n_periods), name='test_metric')
+
+
+@pytest.mark.parametrize('check_name, check_options', [
+    ('outside_of_normal_range', {}),
+    ('outside_of_normal_range', {'rolling_calculation_periods': 12}),
+    ('sudden_change', {}),
+    ('sudden_change', {'rolling_calculation_periods': 12}),
+    ('change_in_steady_state_long', {}),
+])
+def test_checks_match_original_implementation(check_name, check_options):
+    _engines = [engine for engine in legacy_metric_check.ENGINES if engine != 'numba' or find_spec('numba')]
+
+    for seed in range(40):
+        _s = make_tie_prone_test_series(seed)
+        _expected = getattr(original_legacy_metric_check, check_name)(_s, **check_options)
+
+        for engine in _engines:
+            pd.testing.assert_frame_equal(
+                getattr(legacy_metric_check, check_name)(_s, engine=engine, **check_options),
+                _expected,
+                check_exact=False,
+                rtol=1e-7,
+                atol=1e-9,
+                obj=f'{check_name} (engine={engine!r}, seed={seed})',
+            )